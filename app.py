@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flasgger import Swagger
 from flask_jwt_extended import (
@@ -7,29 +7,266 @@ from flask_jwt_extended import (
     jwt_required,
     get_jwt_identity,
 )
-import requests
-import pandas as pd
+import gc
+import os
+import time
+
+import click
+from sqlalchemy.engine import make_url
+
+from auth import HasherBusy, PasswordHasher, UserCache
+from catalogue import SORT_KEYS, CatalogueStore, build_snapshot
+from health import HealthMonitor, upstream_check
+from jobs import ScrapeBusy, ScrapeQueue, books_scraping_command
+from json_provider import FastJSONProvider
+from metrics import Metrics, instrument_engine, phase
+from response_cache import CachedResponse, ResponseCache, not_modified, validators
+from scraping.client import HttpClient
+from sql_catalogue import SqlCatalogue, configure_sqlite, load_books
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config.from_object("config")
+# O SQLite em memória vive na única conexão do seu pool; os demais bancos têm um pool por processo
+memory_database = make_url(app.config["SQLALCHEMY_DATABASE_URI"]).database in (None, "", ":memory:")
+if not memory_database:
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {"pool_size": app.config["DB_POOL_SIZE"]})
 db = SQLAlchemy(app)
 Swagger(app)
 jwt = JWTManager(app)
+metrics = Metrics(app)
 
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password = db.Column(db.String(120), nullable=False)
+    password = db.Column(db.String(255), nullable=False)  # hash scrypt da senha
+
+
+class Book(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # Index do scraping
+    title = db.Column(db.String(255), nullable=False)
+    category = db.Column(db.String(80), nullable=False, index=True)
+    price = db.Column(db.Float, nullable=False, index=True)
+    stock = db.Column(db.Integer, nullable=False)
+    image = db.Column(db.String(255))
+    rating = db.Column(db.Integer, nullable=False, index=True)
+    link = db.Column(db.String(255))
+    description = db.Column(db.Text)
+    position = db.Column(db.Integer, nullable=False, index=True)  # linha no CSV: ordem padrão das listagens
 
 
+with app.app_context():
+    configure_sqlite(db.engine, app.config["SQLITE_WAL"], app.config["SQLITE_BUSY_TIMEOUT"])
+    instrument_engine(db.engine)
+
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
         print("Banco de Dados Criado")
 
-df = pd.read_csv("data/web_scraping.csv", sep=",")
-url = "https://books.toscrape.com/"
+if app.config["CATALOGUE_BACKEND"] == "sqlite":
+    catalogue_store = SqlCatalogue(app, db, app.config["CATALOGUE_PATH"], app.json.dumps)
+else:
+    catalogue_store = CatalogueStore(
+        app.config["CATALOGUE_PATH"], app.json.dumps, snapshot=app.config["CATALOGUE_SNAPSHOT"]
+    )
+if app.config["CATALOGUE_CHECK_INTERVAL"]:
+    catalogue_store.watch(app.config["CATALOGUE_CHECK_INTERVAL"])
+
+
+def database_check():
+    with app.app_context(), db.engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+    return True, {}
+
+
+# Cliente HTTP compartilhado por todas as requisições de saída da API
+http_client = HttpClient(
+    pool_size=app.config["HTTP_POOL_SIZE"],
+    timeout=(app.config["HTTP_CONNECT_TIMEOUT"], app.config["HTTP_READ_TIMEOUT"]),
+)
+metrics.add_collector(lambda: http_client.stats.lines("api"))
+
+health_monitor = HealthMonitor(app.config["HEALTH_CHECK_INTERVAL"])
+health_monitor.add(
+    "upstream", upstream_check(app.config["HEALTH_UPSTREAM_URL"], app.config["HEALTH_CHECK_TIMEOUT"], http_client)
+)
+health_monitor.add("database", database_check)
+health_monitor.start()
+
+response_cache = ResponseCache(app.config["RESPONSE_CACHE_BYTES"], app.config["RESPONSE_CACHE_MIN_COMPRESS"])
+
+password_hasher = PasswordHasher(
+    app.config["AUTH_HASH_WORKERS"],
+    app.config["AUTH_HASH_MAX_PENDING"],
+    app.config["PASSWORD_HASH_METHOD"],
+    request_threads=app.config["SERVER_THREADS"],
+)
+user_cache = UserCache(app.config["AUTH_USER_CACHE_SIZE"], app.config["AUTH_USER_CACHE_TTL"])
+
+
+def publish_catalogue(job):
+    """Publica o catálogo gerado por um job de scraping, sem reiniciar a API."""
+    if not catalogue_store.refresh() and catalogue_store.last_error:
+        raise RuntimeError(catalogue_store.last_error)
+    job.catalogue_version = catalogue_store.current().version
+
+
+scrape_queue = ScrapeQueue(
+    books_scraping_command(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "books_scraping.py"),
+        os.path.abspath(app.config["SCRAPE_PRODUCTS"]),
+        os.path.abspath(app.config["CATALOGUE_PATH"]),
+        app.config["SCRAPE_BASE_URL"],
+    ),
+    on_success=publish_catalogue,
+    lock_path=os.path.abspath(app.config["CATALOGUE_PATH"]) + ".lock",
+    # Estado dos jobs visto por todos os workers do gunicorn
+    state_path=os.path.abspath(app.config["CATALOGUE_PATH"]) + ".jobs.json",
+    history=app.config["SCRAPE_HISTORY"],
+)
+
+
+def before_fork():
+    """Prepara o processo mestre do gunicorn (preload_app) para o fork dos workers.
+
+    As threads de fundo param e são esperadas (inclusive a que monta o índice
+    de busca na partida), para que nenhuma segure um lock no fork; os workers
+    herdam o índice pronto, compartilhado por copy-on-write. As conexões
+    (banco, HTTP) são fechadas, porque não podem ser usadas por dois
+    processos. Por fim os objetos já carregados vão para a geração permanente
+    do GC, para que as coletas nos workers não escrevam nas páginas herdadas.
+    Um banco SQLite em memória não é fechado: cada worker fica com a sua cópia.
+    """
+    catalogue_store.stop(wait=True)
+    health_monitor.stop(wait=True)
+    catalogue_store.current().warm()  # Só monta o índice se a thread da partida falhou
+    http_client.close()
+    if not memory_database:
+        with app.app_context():
+            db.engine.dispose()
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork():
+    """Reinicia em cada worker as threads de fundo paradas em `before_fork`."""
+    health_monitor.start()
+    if app.config["CATALOGUE_CHECK_INTERVAL"]:
+        catalogue_store.watch(app.config["CATALOGUE_CHECK_INTERVAL"])
+
+
+def valid_credentials(data):
+    """True se o JSON tem username e password, ambos como texto."""
+    return isinstance(data, dict) and all(isinstance(data.get(key), str) for key in ("username", "password"))
+
+
+def busy_response():
+    response = jsonify({"error": "Muitos logins simultâneos, tente novamente"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+@app.cli.command("load-books")
+@click.argument("path", default=lambda: app.config["CATALOGUE_PATH"])
+@click.option("--batch-size", default=1000, show_default=True)
+def load_books_command(path, batch_size):
+    """Importa o CSV do scraping na tabela book do banco."""
+    db.create_all()
+    with db.engine.begin() as connection:
+        count = load_books(connection, path, batch_size)
+    print(f"{count} livros importados")
+
+
+@app.cli.command("build-snapshot")
+@click.argument("path", default=lambda: app.config["CATALOGUE_PATH"])
+def build_snapshot_command(path):
+    """Gera o snapshot colunar do CSV do scraping, usado na partida da API."""
+    target = build_snapshot(path, app.config["CATALOGUE_SNAPSHOT"])
+    print(f"Snapshot gravado em {target}")
+
+
+def paginate(rows):
+    """Aplica os parâmetros `limit` e `offset` da query string a uma sequência."""
+    offset = max(request.args.get("offset", default=0, type=int), 0)
+    limit = request.args.get("limit", type=int)
+    if limit is None:
+        return rows[offset:]
+    return rows[offset:offset + max(limit, 0)]
+
+
+NDJSON_CHUNK = 1000
+
+
+def wants_ndjson():
+    return request.args.get("format") == "ndjson" or request.accept_mimetypes.best == "application/x-ndjson"
+
+
+def records_response(catalogue, rows):
+    """Responde com as linhas `rows` do catálogo.
+
+    Aplica a paginação, a projeção de colunas de `fields` e, com
+    `format=ndjson` (ou `Accept: application/x-ndjson`), envia um livro por
+    linha em streaming, convertendo o resultado em blocos.
+    """
+    fields = request.args.get("fields")
+    columns = [field.strip() for field in fields.split(",") if field.strip()] if fields else catalogue.columns
+    columns = list(dict.fromkeys(columns))
+    invalid = [column for column in columns if column not in catalogue.columns]
+    if invalid:
+        return jsonify({"error": f"Campos inválidos: {', '.join(invalid)}"}), 400
+
+    total = len(rows)
+    page = paginate(rows)
+    headers = {"X-Total-Count": total}
+
+    if wants_ndjson():
+        def generate():
+            for start in range(0, len(page), NDJSON_CHUNK):
+                yield app.json.ndjson(columns, catalogue.column_values(page[start:start + NDJSON_CHUNK], columns))
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson", headers=headers)
+
+    with phase("serialize"):
+        response = app.json.records_response(columns, catalogue.column_values(page, columns))
+    response.headers.update(headers)
+    return response
+
+
+def cache_key():
+    return (request.path, tuple(sorted(request.args.items(multi=True))))
+
+
+def served_from_cache():
+    """True se `cached_response` responderia a requisição atual sem consultar o catálogo.
+
+    É o caso de um 304 da versão atual ou de uma entrada já pronta no cache de
+    respostas; o modo ASGI usa isso para decidir o que roda no event loop.
+    """
+    if wants_ndjson():
+        return False
+    version = catalogue_store.current().version
+    return not_modified(request, version) or response_cache.ready(version, cache_key(), request)
+
+
+def cached_response(build, max_age=None):
+    """Resposta de `build(catalogue)` servida do cache de respostas prontas.
+
+    A entrada é guardada por rota e query string na versão atual do catálogo,
+    já serializada e comprimida, e revalidável por ETag. Pedidos em ndjson
+    (streaming) não passam pelo cache.
+    """
+    catalogue = catalogue_store.current()
+    if wants_ndjson():
+        return build(catalogue)
+    if not_modified(request, catalogue.version):
+        return validators(app.response_class(status=304), catalogue.version, max_age=max_age)
+    result = response_cache.get_or_build(catalogue.version, cache_key(), lambda: app.make_response(build(catalogue)))
+    if isinstance(result, CachedResponse):
+        return response_cache.respond(result, request, max_age)
+    return result
 
 
 @app.route("/api/v1/auth/register", methods=["POST"])
@@ -59,18 +296,26 @@ def register():
         description: Usuário criado com sucesso
       400:
         description: Usuário já existe ou parâmetros inválidos
+      503:
+        description: Fila de hash de senhas cheia; tente novamente após Retry-After.
     """
     data = request.get_json()
 
-    if not data or "username" not in data or "password" not in data:
+    if not valid_credentials(data):
         return jsonify({"error": "Parâmetros ausentes ou inválidos"}), 400
 
     if User.query.filter_by(username=data["username"]).first():
         return jsonify({"error": "User already exists"}), 400
 
-    new_user = User(username=data["username"], password=data["password"])
+    try:
+        with phase("auth"):
+            password = password_hasher.hash(data["password"])
+    except HasherBusy:
+        return busy_response()
+    new_user = User(username=data["username"], password=password)
     db.session.add(new_user)
     db.session.commit()
+    user_cache.invalidate(data["username"])
     return jsonify({"message": "User created"}), 201
 
 
@@ -96,18 +341,41 @@ def login():
         description: Login realizado
       400:
         description: Login inválido
+      503:
+        description: Fila de hash de senhas cheia; tente novamente após Retry-After.
     """
     data = request.get_json()
 
-    if not data or "username" not in data or "password" not in data:
+    if not valid_credentials(data):
         return jsonify({"error": "Parâmetros ausentes ou inválidos"}), 400
 
-    user = User.query.filter_by(username=data["username"]).first()
-    if user and user.password == data["password"]:
-        token = create_access_token(identity=str(user.id))
-        return jsonify({"access_token": token}), 200
+    username = data["username"]
+    cached = user_cache.get(username)
+    if cached is None:
+        user = User.query.filter_by(username=username).first()
+        if user:
+            cached = (user.id, user.password)
+            user_cache.put(username, cached)
+    user_id, stored = cached or (None, None)
 
-    return jsonify({"error": "invalid credentials"}), 401
+    try:
+        with phase("auth"):
+            valid = password_hasher.verify(stored, data["password"])
+            if valid and password_hasher.needs_rehash(stored):
+                # Senha antiga em texto puro (ou outro método): grava o hash atual
+                stored = password_hasher.hash(data["password"])
+    except HasherBusy:
+        return busy_response()
+    if not valid:
+        return jsonify({"error": "invalid credentials"}), 401
+
+    if stored != cached[1]:
+        db.session.get(User, user_id).password = stored
+        db.session.commit()
+        user_cache.put(username, (user_id, stored))
+    with phase("auth"):
+        token = create_access_token(identity=str(user_id))
+    return jsonify({"access_token": token}), 200
 
 
 @app.route("/api/v1/auth/refresh", methods=["POST"])
@@ -138,31 +406,147 @@ def refresh():
         description: Token de refresh inválido ou expirado
     """
     current_user = get_jwt_identity()
-    new_access_token = create_access_token(identity=current_user)
+    with phase("auth"):
+        new_access_token = create_access_token(identity=current_user)
     return jsonify(access_token=new_access_token), 200
 
 
 @app.route("/api/v1/scraping/trigger", methods=["POST"])
 @jwt_required()
-def protected():
+def trigger_scraping():
     """
-    Área Restrita
+    Disparo do scraping
     ---
     tags:
       - Acesso Restrito
-    description: Endpoint protegido que requer token JWT válido no header Authorization para acesso.
+    description: >
+      Enfileira um scraping das páginas de produto (scripts/books_scraping.py) e
+      responde na hora com o id do job. Ao terminar, o novo catálogo é publicado
+      na API sem reiniciar. Só há um scraping ativo por vez: se já houver um na
+      fila ou em execução, a resposta traz esse mesmo job.
     security:
       - BearerAuth: []
+    parameters:
+      - name: incremental
+        in: query
+        type: boolean
+        required: false
+        description: Reaproveita as linhas das páginas que não mudaram desde o último scraping.
+      - name: restart
+        in: query
+        type: boolean
+        required: false
+        description: Ignora o checkpoint de um scraping interrompido e começa do zero.
     responses:
+      202:
+        description: Job criado. O header Location aponta para o status do job.
       200:
-        description: Acesso autorizado. Retorna mensagem com ID do usuário.
+        description: Já havia um scraping ativo; retorna esse job.
       401:
         description: Token ausente ou inválido.
+      409:
+        description: Um scraping fora da fila de jobs (outro processo) segura o lock do catálogo.
     """
-    current_user_id = get_jwt_identity()
-    return jsonify(
-        {"mensage": f"Usuário com ID {current_user_id} Acessou a Rota Protegida"}
-    )
+    options = {
+        "incremental": request.args.get("incremental", "false").lower() == "true",
+        "restart": request.args.get("restart", "false").lower() == "true",
+    }
+    try:
+        job, created = scrape_queue.submit(options, requested_by=get_jwt_identity())
+    except ScrapeBusy:
+        return jsonify({"error": "Já existe um scraping em andamento fora da fila de jobs"}), 409
+    response = jsonify(job.to_dict())
+    response.status_code = 202 if created else 200
+    response.headers["Location"] = f"/api/v1/scraping/jobs/{job.id}"
+    return response
+
+
+@app.route("/api/v1/scraping/jobs/<job_id>")
+@jwt_required()
+def scrape_job(job_id):
+    """
+    Status de um job de scraping
+    ---
+    tags:
+      - Acesso Restrito
+    description: Estado e andamento de um job criado por /api/v1/scraping/trigger.
+    security:
+      - BearerAuth: []
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Job encontrado.
+        schema:
+          type: object
+          properties:
+            id:
+              type: string
+            status:
+              type: string
+              description: na fila, executando, concluído ou falhou.
+            progress:
+              type: object
+              properties:
+                done:
+                  type: integer
+                  description: Páginas de produto processadas.
+                total:
+                  type: integer
+                  description: Total de páginas de produto.
+                pages_per_sec:
+                  type: number
+                errors:
+                  type: integer
+            error:
+              type: string
+            catalogue_version:
+              type: string
+              description: Versão do catálogo publicada ao final do job.
+      401:
+        description: Token ausente ou inválido.
+      404:
+        description: Job não encontrado.
+    """
+    job = scrape_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado"}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/api/v1/admin/reload", methods=["POST"])
+@jwt_required()
+def reload_catalogue():
+    """
+    Recarga do catálogo
+    ---
+    tags:
+      - Acesso Restrito
+    description: >
+      Carrega o CSV do catálogo em um novo snapshot em segundo plano e o publica
+      quando estiver pronto, sem reiniciar a API. Use `force=true` para recarregar
+      mesmo que o arquivo não tenha mudado.
+    security:
+      - BearerAuth: []
+    parameters:
+      - name: force
+        in: query
+        type: boolean
+        required: false
+        description: Recarrega mesmo sem mudança no arquivo.
+    responses:
+      202:
+        description: Recarga iniciada. Retorna a versão do catálogo em uso.
+      401:
+        description: Token ausente ou inválido.
+    """
+    force = request.args.get("force", "false").lower() == "true"
+    catalogue_store.refresh_async(force=force)
+    catalogue = catalogue_store.current()
+    return jsonify({"status": "recarga iniciada", "version": catalogue.version, "books": catalogue.size}), 202
+
 
 @app.route("/api/v1/books")
 def books():
@@ -171,8 +555,13 @@ def books():
     ---
     tags:
       - Livros Disponíveis
-    description: Retorna uma lista com os títulos de todos os livros disponíveis na base de dados.
+    description: >
+      Retorna uma lista com os títulos de todos os livros disponíveis na base de dados.
+      A resposta fica pronta (e comprimida com gzip) por versão do catálogo e tem ETag,
+      então o cliente pode revalidar com If-None-Match.
     responses:
+      304:
+        description: O catálogo não mudou desde o ETag enviado em If-None-Match.
       200:
         description: Lista de títulos dos livros
         schema:
@@ -180,7 +569,11 @@ def books():
           items:
             type: string
     """
-    return jsonify(df["Title"].tolist()), 200
+    def build(catalogue):
+        with phase("serialize"):
+            return jsonify(catalogue.titles())
+
+    return cached_response(build)
 
 @app.route("/api/v1/books/<id>")
 def books_id(id):
@@ -206,10 +599,14 @@ def books_id(id):
       404:
         description: Livro não encontrado
     """
-    id = int(id)
-    book_id = df.query("Index == @id")
-    book_id = book_id.to_dict(orient="records")
-    return jsonify(book_id)
+    catalogue = catalogue_store.current()
+    try:
+        book = catalogue.book_json(int(id))
+    except ValueError:
+        book = None
+    if book is None:
+        return jsonify({"error": "Livro não encontrado"}), 404
+    return app.response_class(book, mimetype="application/json")
 
 @app.route("/api/v1/books/search")
 def search():
@@ -218,18 +615,49 @@ def search():
     ---
     tags:
       - Livros Disponíveis
-    description: Busca livros na base de dados filtrando por título e/ou categoria.
+    description: >
+      Busca livros na base de dados por texto livre (título, categoria e descrição),
+      título e/ou categoria. As palavras são buscadas no índice invertido do catálogo
+      e também casam como prefixo ("pyth" encontra "python"). Com `q` ou `title`, os
+      resultados vêm ordenados por relevância. O total de resultados é informado no
+      header `X-Total-Count`.
     parameters:
+      - name: q
+        in: query
+        type: string
+        required: false
+        description: Palavras buscadas no título, na categoria e na descrição.
       - name: title
         in: query
         type: string
         required: false
-        description: Parte ou nome completo do título do livro.
+        description: Palavras do título do livro.
       - name: category
         in: query
         type: string
         required: false
         description: Parte ou nome completo da categoria do livro.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de livros retornados.
+      - name: offset
+        in: query
+        type: integer
+        required: false
+        description: Quantidade de resultados a pular (padrão 0).
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Colunas retornadas, separadas por vírgula (ex. Title,Price).
+      - name: format
+        in: query
+        type: string
+        enum: [json, ndjson]
+        required: false
+        description: Use ndjson para receber um livro por linha em streaming.
     responses:
       200:
         description: Lista de livros que correspondem aos critérios de busca.
@@ -238,18 +666,101 @@ def search():
           items:
             type: object
     """
+    catalogue = catalogue_store.current()
+    q = request.args.get("q", "")
+    title = request.args.get("title", "")
+    category = request.args.get("category", "")
+
+    with phase("filter"):
+        rows = catalogue.search(q, title, category)
+    return records_response(catalogue, rows)
+
+@app.route("/api/v1/books/facets")
+def facets():
+    """
+    Facetas da busca
+    ---
+    tags:
+      - Estatísticas
+    description: >
+      Retorna, em uma única resposta, as agregações dos livros que atendem aos mesmos
+      filtros da busca: total de livros, estoque, médias de nota e preço, livros e nota
+      média por categoria, histograma de notas e contagem por faixa de preço. Tudo é
+      calculado em uma passada sobre os códigos de categoria, notas, preços e estoques
+      do resultado. Sem filtros, as facetas do catálogo inteiro vêm prontas do snapshot.
+      A resposta tem ETag pela versão do catálogo e pode ser revalidada com If-None-Match.
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: false
+        description: Palavras buscadas no título, na categoria e na descrição.
+      - name: title
+        in: query
+        type: string
+        required: false
+        description: Palavras do título do livro.
+      - name: category
+        in: query
+        type: string
+        required: false
+        description: Parte ou nome completo da categoria do livro.
+    responses:
+      304:
+        description: O catálogo não mudou desde o ETag enviado em If-None-Match.
+      200:
+        description: Facetas dos livros filtrados.
+        schema:
+          type: object
+          properties:
+            Number of Books:
+              type: integer
+            Stock:
+              type: integer
+            Average Rating:
+              type: number
+              format: float
+            Average Price:
+              type: number
+              format: float
+            Categories:
+              type: array
+              items:
+                type: object
+                properties:
+                  Category:
+                    type: string
+                  Number_of_Books:
+                    type: integer
+                  Avg_Rating:
+                    type: number
+                    format: float
+            Ratings:
+              type: object
+              description: Quantidade de livros por nota.
+            Price Buckets:
+              type: array
+              items:
+                type: object
+                properties:
+                  min:
+                    type: number
+                  max:
+                    type: number
+                    description: Limite superior (exclusivo); null na última faixa.
+                  count:
+                    type: integer
+    """
+    q = request.args.get("q", "")
     title = request.args.get("title", "")
     category = request.args.get("category", "")
-    df_filtered = df
-    if title:
-        df_filtered = df_filtered[
-            df_filtered["Title"].str.contains(title, case=False, na=False)
-        ]
-    if category:
-        df_filtered = df_filtered[
-            df_filtered["Category"].str.contains(category, case=False, na=False)
-        ]
-    return jsonify(df_filtered.to_dict(orient="records"))
+
+    def build(catalogue):
+        with phase("filter"):
+            payload = catalogue.facets(q, title, category)
+        return jsonify(payload)
+
+    return cached_response(build, app.config["STATS_MAX_AGE"])
 
 @app.route("/api/v1/categories")
 def categories():
@@ -260,6 +771,8 @@ def categories():
       - Categorias
     description: Retorna a lista de todas as categorias únicas presentes na base de dados.
     responses:
+      304:
+        description: O catálogo não mudou desde o ETag enviado em If-None-Match.
       200:
         description: Lista de categorias únicas
         schema:
@@ -267,9 +780,7 @@ def categories():
           items:
             type: string
     """
-    categories = df.iloc[:, 1]
-    unique_categories = list(set(categories))
-    return jsonify(unique_categories)
+    return cached_response(lambda catalogue: jsonify(catalogue.categories))
 
 @app.route("/api/v1/health")
 def health():
@@ -278,7 +789,10 @@ def health():
     ---
     tags:
       - Monitoramento
-    description: Verifica a conectividade da API com o serviço externo configurado.
+    description: >
+      Informa o resultado da última verificação da conectividade com o site de
+      origem. A verificação é feita em segundo plano a cada HEALTH_CHECK_INTERVAL
+      segundos; este endpoint não faz nenhuma requisição externa.
     responses:
       200:
         description: Conexão bem-sucedida com o serviço externo.
@@ -291,6 +805,9 @@ def health():
             code:
               type: integer
               description: Código HTTP retornado pelo serviço externo.
+            checked_at:
+              type: number
+              description: Horário (epoch) da última verificação.
       400:
         description: Falha na conexão com o serviço externo.
         schema:
@@ -302,15 +819,66 @@ def health():
             code:
               type: integer
               description: Código HTTP retornado ou ausência de resposta.
+      503:
+        description: A primeira verificação ainda não terminou.
     """
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            return jsonify({"status": "conectado", "code": 200}), 200
-        else:
-            return jsonify({"status": "falha", "code": response.status_code}), 400
-    except requests.RequestException:
-        return jsonify({"status": "erro de conexão"}), 400
+    result = health_monitor.result("upstream")
+    if result is None:
+        return jsonify({"status": "pendente"}), 503
+    if result["ok"]:
+        return jsonify({"status": "conectado", "code": 200, "checked_at": result["checked_at"]}), 200
+    if "code" in result:
+        return jsonify({"status": "falha", "code": result["code"], "checked_at": result["checked_at"]}), 400
+    return jsonify({"status": "erro de conexão", "checked_at": result["checked_at"]}), 400
+
+
+@app.route("/api/v1/health/live")
+def liveness():
+    """
+    Liveness
+    ---
+    tags:
+      - Monitoramento
+    description: Indica que o processo está de pé e respondendo. Não faz nenhum I/O.
+    responses:
+      200:
+        description: Processo ativo.
+    """
+    return jsonify({"status": "ok"}), 200
+
+
+@app.route("/api/v1/health/ready")
+def readiness():
+    """
+    Readiness
+    ---
+    tags:
+      - Monitoramento
+    description: >
+      Indica se a API está pronta para receber tráfego: catálogo carregado e banco
+      acessível. Informa também a idade do snapshot do catálogo e o último resultado
+      da verificação do site de origem, que não afeta a prontidão. Tudo é lido do
+      estado em memória mantido pelas verificações em segundo plano.
+    responses:
+      200:
+        description: API pronta.
+      503:
+        description: Catálogo ainda não carregado ou banco inacessível.
+    """
+    catalogue = catalogue_store.current()
+    database = health_monitor.result("database")
+    payload = {
+        "catalogue": {
+            "loaded": catalogue is not None,
+            "snapshot_age": round(time.time() - catalogue.loaded_at, 1) if catalogue is not None else None,
+            "last_error": catalogue_store.last_error,
+        },
+        "database": database,
+        "upstream": health_monitor.result("upstream"),
+    }
+    ready = catalogue is not None and database is not None and database["ok"]
+    payload["status"] = "pronto" if ready else "indisponível"
+    return jsonify(payload), 200 if ready else 503
 
 
 @app.route("/api/v1/stats/overview")
@@ -320,8 +888,13 @@ def overview():
     ---
     tags:
       - Estatísticas
-    description: Retorna um resumo com estatísticas gerais dos livros disponíveis na base de dados.
+    description: >
+      Retorna um resumo com estatísticas gerais dos livros disponíveis na base de dados.
+      As estatísticas são calculadas uma vez por versão do catálogo e enviadas com
+      ETag e Cache-Control, então o cliente pode revalidar com If-None-Match.
     responses:
+      304:
+        description: O catálogo não mudou desde o ETag enviado em If-None-Match.
       200:
         description: Resumo estatístico dos livros.
         schema:
@@ -342,22 +915,7 @@ def overview():
               type: integer
               description: Número total de livros cadastrados.
     """
-    df["Price"] = pd.to_numeric(df["Price"])
-    df["Stock"] = pd.to_numeric(df["Stock"])
-    df["Rating"] = pd.to_numeric(df["Rating"])
-
-    num_livros = len(df["Title"].tolist())
-    average_price = round(df["Price"].mean(), 2)
-    average_rating = df["Rating"].mean()
-    stock = df["Stock"].sum()
-
-    overview = {
-        "Stock": int(stock),
-        "Average Rating": float(round(average_rating, 2)),
-        "Average Price": float(average_price),
-        "Number of Books": num_livros,
-    }
-    return jsonify(overview)
+    return cached_response(lambda catalogue: jsonify(catalogue.overview), app.config["STATS_MAX_AGE"])
 
 @app.route("/api/v1/stats/categories")
 def stats_categories():
@@ -366,8 +924,13 @@ def stats_categories():
     ---
     tags:
       - Estatísticas
-    description: Retorna o número de livros e a média das avaliações agrupados por categoria.
+    description: >
+      Retorna o número de livros e a média das avaliações agrupados por categoria.
+      As estatísticas são calculadas uma vez por versão do catálogo e enviadas com
+      ETag e Cache-Control, então o cliente pode revalidar com If-None-Match.
     responses:
+      304:
+        description: O catálogo não mudou desde o ETag enviado em If-None-Match.
       200:
         description: Estatísticas agrupadas por categoria.
         schema:
@@ -386,12 +949,7 @@ def stats_categories():
                 format: float
                 description: Avaliação média dos livros da categoria
     """
-    grouped = (
-        df.groupby("Category")
-        .agg(Number_of_Books=("Title", "count"), Avg_Rating=("Rating", "mean"))
-        .reset_index()
-    )
-    return jsonify(grouped.to_dict(orient="records"))
+    return cached_response(lambda catalogue: jsonify(catalogue.category_stats), app.config["STATS_MAX_AGE"])
 
 
 
@@ -402,8 +960,35 @@ def top_rated():
     ---
     tags:
       - Livros Disponíveis
-    description: Retorna a lista de livros com avaliação máxima (nota 5).
+    description: >
+      Retorna a lista de livros com avaliação máxima (nota 5). O total de
+      resultados é informado no header `X-Total-Count`. Cada combinação de
+      parâmetros fica pronta (e comprimida) por versão do catálogo, com ETag.
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de livros retornados.
+      - name: offset
+        in: query
+        type: integer
+        required: false
+        description: Quantidade de resultados a pular (padrão 0).
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Colunas retornadas, separadas por vírgula (ex. Title,Price).
+      - name: format
+        in: query
+        type: string
+        enum: [json, ndjson]
+        required: false
+        description: Use ndjson para receber um livro por linha em streaming.
     responses:
+      304:
+        description: O catálogo não mudou desde o ETag enviado em If-None-Match.
       200:
         description: Lista de livros com nota 5.
         schema:
@@ -411,8 +996,12 @@ def top_rated():
           items:
             type: object
     """
-    top_rated = df.query("Rating == 5")
-    return jsonify(top_rated.to_dict(orient="records"))
+    def build(catalogue):
+        with phase("filter"):
+            rows = catalogue.top_rated()
+        return records_response(catalogue, rows)
+
+    return cached_response(build)
 
 
 @app.route("/api/v1/books/price-range")
@@ -422,7 +1011,10 @@ def price_range():
     ---
     tags:
       - Consulta por Preço
-    description: Retorna os livros cujo preço esteja dentro de uma faixa especificada.
+    description: >
+      Retorna os livros cujo preço esteja dentro de uma faixa especificada, opcionalmente
+      filtrados também por categoria e nota. A faixa é resolvida por busca binária nos
+      preços pré-ordenados. O total de resultados é informado no header `X-Total-Count`.
     parameters:
       - name: min
         in: query
@@ -436,6 +1028,49 @@ def price_range():
         format: float
         required: false
         description: Preço máximo.
+      - name: category
+        in: query
+        type: string
+        required: false
+        description: Parte ou nome completo da categoria do livro.
+      - name: rating
+        in: query
+        type: integer
+        required: false
+        description: Nota exata do livro (1 a 5).
+      - name: sort
+        in: query
+        type: string
+        enum: [index, price, rating]
+        required: false
+        description: Campo de ordenação (padrão é a ordem do catálogo).
+      - name: order
+        in: query
+        type: string
+        enum: [asc, desc]
+        required: false
+        description: Direção da ordenação (padrão asc).
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de livros retornados.
+      - name: offset
+        in: query
+        type: integer
+        required: false
+        description: Quantidade de resultados a pular (padrão 0).
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Colunas retornadas, separadas por vírgula (ex. Title,Price).
+      - name: format
+        in: query
+        type: string
+        enum: [json, ndjson]
+        required: false
+        description: Use ndjson para receber um livro por linha em streaming.
     responses:
       200:
         description: Lista de livros dentro da faixa de preço especificada.
@@ -458,6 +1093,8 @@ def price_range():
                 format: float
               Stock:
                 type: integer
+      400:
+        description: Parâmetro de ordenação ou nota inválido.
     """
     min_val = request.args.get("min", None)
     max_val = request.args.get("max", None)
@@ -472,15 +1109,21 @@ def price_range():
     except ValueError:
         max_val = None
 
-    df["Price"] = pd.to_numeric(df["Price"], errors="coerce")
-    df_filtered = df
-
-    if min_val is not None:
-        df_filtered = df_filtered[df_filtered["Price"] >= min_val]
-    if max_val is not None:
-        df_filtered = df_filtered[df_filtered["Price"] <= max_val]
+    category = request.args.get("category", "")
+    rating = request.args.get("rating", type=int)
+    if "rating" in request.args and rating is None:
+        return jsonify({"error": "rating deve ser um número inteiro"}), 400
+    sort = request.args.get("sort")
+    if sort is not None and sort not in SORT_KEYS:
+        return jsonify({"error": f"sort deve ser um de: {', '.join(SORT_KEYS)}"}), 400
+    order = request.args.get("order", "asc")
+    if order not in ("asc", "desc"):
+        return jsonify({"error": "order deve ser asc ou desc"}), 400
 
-    return jsonify(df_filtered.to_dict(orient="records"))
+    catalogue = catalogue_store.current()
+    with phase("filter"):
+        rows = catalogue.price_range(min_val, max_val, category, rating, sort, order == "desc")
+    return records_response(catalogue, rows)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+"""Modo de execução ASGI da API.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+
+O servidor ASGI (uvicorn) mantém as conexões keep-alive no event loop, então
+milhares de clientes ociosos custam só um socket cada, e não uma thread.
+As rotas continuam sendo as do app Flask (com JWT e Swagger); este módulo
+converte cada requisição ASGI em uma chamada WSGI e escolhe onde ela roda:
+
+* só o que responde em tempo constante roda direto no event loop, sem
+  troca de thread: as rotas de saúde (`INLINE_ENDPOINTS`), que leem o
+  resultado já guardado das verificações, e, com o catálogo em memória, as
+  rotas do cache de respostas (`CACHED_ENDPOINTS`) quando a resposta já está
+  pronta no cache ou é um 304 da versão atual;
+* todo o resto roda em um pool de `ASGI_THREADS` threads: busca, facetas,
+  listagens e estatísticas ainda não cacheadas (que percorrem ou serializam
+  o catálogo), rotas que consultam o banco, login e cadastro (hash de senha),
+  rotas restritas e Swagger.
+
+No startup, a thread de verificações de saúde dá lugar a uma tarefa do event
+loop que consulta o site de origem com um `httpx.AsyncClient`.
+"""
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from werkzeug.exceptions import HTTPException
+
+from app import app, health_monitor, served_from_cache
+from health import async_upstream_check
+from scraping.client import USER_AGENT
+
+# Rotas que só leem o resultado guardado das verificações de saúde
+INLINE_ENDPOINTS = {
+    "health",
+    "liveness",
+    "readiness",
+}
+# Rotas servidas por `cached_response`: no event loop só quando a resposta já está pronta
+CACHED_ENDPOINTS = {
+    "books",
+    "categories",
+    "overview",
+    "stats_categories",
+    "top_rated",
+}
+# Blocos de uma resposta em streaming gerados à frente do envio
+STREAM_BUFFER = 4
+
+
+def wsgi_environ(scope, body):
+    """Environ WSGI equivalente ao `scope` de uma requisição HTTP ASGI."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": scope["client"][0] if scope.get("client") else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = "HTTP_" + name
+        if name in environ:
+            # Vários cabeçalhos Cookie (HTTP/2) formam uma única lista separada por "; "
+            value = f"{environ[name]}{'; ' if name == 'HTTP_COOKIE' else ','}{value}"
+        environ[name] = value
+    return environ
+
+
+def inline(environ):
+    """True se a requisição responde em tempo constante e pode rodar no event loop."""
+    name = endpoint(environ)
+    if name in INLINE_ENDPOINTS:
+        return True
+    if name not in CACHED_ENDPOINTS or app.config["CATALOGUE_BACKEND"] != "memory":
+        # Com o SQLite até a versão do catálogo é uma consulta ao banco
+        return False
+    with app.request_context(environ):
+        return served_from_cache()
+
+
+def endpoint(environ):
+    """Nome da view do Flask que atenderá a requisição (None se não houver rota)."""
+    try:
+        name, _ = app.url_map.bind_to_environ(environ).match()
+    except HTTPException:
+        return None
+    return name
+
+
+class Application:
+    """Aplicação ASGI que serve o app Flask (veja a descrição do módulo)."""
+
+    def __init__(self, wsgi_app, threads=8):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="asgi-worker")
+        self.client = None
+        self._health = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def startup(self):
+        # Mesmo User-Agent, pool e timeouts do cliente HTTP síncrono da API
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=app.config["HTTP_POOL_SIZE"]),
+            timeout=httpx.Timeout(app.config["HTTP_READ_TIMEOUT"], connect=app.config["HTTP_CONNECT_TIMEOUT"]),
+        )
+        health_monitor.stop()
+        health_monitor.add(
+            "upstream",
+            async_upstream_check(app.config["HEALTH_UPSTREAM_URL"], app.config["HEALTH_CHECK_TIMEOUT"], self.client),
+        )
+        self._health = asyncio.create_task(health_monitor.serve_async())
+
+    async def shutdown(self):
+        if self._health is not None:
+            self._health.cancel()
+        if self.client is not None:
+            await self.client.aclose()
+        self.executor.shutdown(wait=False)
+
+    async def http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        environ = wsgi_environ(scope, bytes(body))
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+        if inline(environ):
+            iterable = self.wsgi_app(environ, start_response)
+            try:
+                await send({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+                for chunk in iterable:
+                    if chunk:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            finally:
+                if hasattr(iterable, "close"):
+                    iterable.close()
+            await send({"type": "http.response.body", "body": b""})
+        else:
+            await self._call_in_pool(environ, start_response, response, send)
+
+    async def _call_in_pool(self, environ, start_response, response, send):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(STREAM_BUFFER)
+        abort = threading.Event()
+        call = loop.run_in_executor(
+            self.executor, self._call_blocking, loop, environ, start_response, response, queue, abort
+        )
+        try:
+            chunk, last = await queue.get()
+            if "status" not in response:
+                await call  # O app falhou antes de responder: propaga a exceção
+            await send({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+            while True:
+                await send({"type": "http.response.body", "body": chunk, "more_body": not last})
+                if last:
+                    break
+                chunk, last = await queue.get()
+        except BaseException:
+            # Cliente desconectou: a thread para no próximo bloco e a fila é esvaziada até o fim
+            abort.set()
+            asyncio.ensure_future(self._drain(queue))
+            raise
+        await call
+
+    def _call_blocking(self, loop, environ, start_response, response, queue, abort):
+        """Chama o app no pool e entrega os blocos da resposta ao event loop, em ordem.
+
+        Uma resposta pronta (com Content-Length) vai inteira, de uma vez; uma em
+        streaming (ndjson) vai bloco a bloco, gerados à frente do envio até
+        `STREAM_BUFFER`. Chamada e iteração ficam na mesma thread, porque o
+        `stream_with_context` do Flask abre o contexto da requisição na chamada
+        e o fecha no fim da iteração.
+        """
+        def put(chunk, last):
+            asyncio.run_coroutine_threadsafe(queue.put((chunk, last)), loop).result()
+
+        iterable = None
+        finished = False
+        try:
+            iterable = self.wsgi_app(environ, start_response)
+            if any(name == b"content-length" for name, _ in response["headers"]):
+                body = b"".join(iterable)
+                finished = True
+                put(body, True)
+                return
+            for chunk in iterable:
+                if abort.is_set():
+                    break
+                if chunk:
+                    put(chunk, False)
+        finally:
+            try:
+                if hasattr(iterable, "close"):
+                    iterable.close()
+            finally:
+                if not finished:
+                    put(b"", True)
+
+    @staticmethod
+    async def _drain(queue):
+        while not (await queue.get())[1]:
+            pass
+
+
+application = Application(app, app.config["ASGI_THREADS"])
@@ -0,0 +1,102 @@
+"""Hash de senhas fora das threads de requisição e cache de usuários do login.
+
+O hash (scrypt, pelo `werkzeug.security`) é caro de propósito: cerca de
+0,15 s de CPU por senha. Para que uma rajada de logins não ocupe todos os
+workers e atrase os endpoints do catálogo, os hashes rodam em um pool de
+threads limitado (o scrypt do hashlib libera o GIL). A thread da requisição
+espera o seu hash, então no máximo `request_threads - 1` logins esperam ao
+mesmo tempo; os demais são recusados na hora com `HasherBusy`, e sempre
+sobra uma thread de requisição para o catálogo.
+
+`UserCache` guarda, por alguns minutos, o id e o hash de cada usuário
+consultado no login, evitando uma consulta ao banco por tentativa.
+"""
+import hmac
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Formato completo do werkzeug ("método:parâmetros$salt$hash"): uma senha antiga em texto puro que só
+# comece com "scrypt:" não é confundida com um hash e ainda é convertida no login
+HASH_FORMAT = re.compile(r"(scrypt:\d+:\d+:\d+|pbkdf2:[a-z0-9_]+:\d+)\$[A-Za-z0-9]+\$[0-9a-f]+")
+
+
+class HasherBusy(Exception):
+    """A fila de hashes está cheia; o cliente deve tentar de novo mais tarde."""
+
+
+def is_hashed(stored):
+    return HASH_FORMAT.fullmatch(stored) is not None
+
+
+class PasswordHasher:
+    def __init__(self, workers=2, max_pending=2, method="scrypt", request_threads=None):
+        self.method = method
+        if request_threads:
+            max_pending = max(1, min(max_pending, request_threads - 1))
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # Hash de referência para gastar o mesmo tempo quando o usuário não existe
+        self._dummy = generate_password_hash("", method=method)
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            return self._pool.submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored, password):
+        """Confere a senha com o valor guardado; `stored` None simula um usuário inexistente."""
+        if stored is None:
+            self._run(check_password_hash, self._dummy, password)
+            return False
+        if not is_hashed(stored):
+            # Senha gravada em texto puro antes do hash; o login a converte
+            return hmac.compare_digest(stored.encode(), password.encode())
+        return self._run(check_password_hash, stored, password)
+
+    def needs_rehash(self, stored):
+        return not is_hashed(stored) or not stored.startswith(self.method + ":")
+
+
+class UserCache:
+    """Cache LRU com expiração de username -> (id, hash da senha)."""
+
+    def __init__(self, size=1024, ttl=300):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username):
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[username]
+                return None
+            self._entries.move_to_end(username)
+            return value
+
+    def put(self, username, value):
+        with self._lock:
+            self._entries[username] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
@@ -0,0 +1,221 @@
+"""Benchmark de carga de todas as rotas de leitura da API.
+
+Para cada tamanho de catálogo sintético (formato do web_scraping.csv), sobe
+a API em um processo separado, servindo HTTP em 127.0.0.1, e dispara
+`--concurrency` clientes simultâneos contra cada rota. Informa, por rota,
+latência p50/p95/p99, vazão e o pico de memória do servidor durante a rota,
+e grava tudo em JSON para comparar execuções entre commits. Não usa rede
+externa: a verificação de saúde do site de origem aponta para um endereço local.
+
+    python benchmarks/bench_api.py --rows 1000 100000 1000000 --concurrency 8
+    python benchmarks/bench_api.py --rows 1000 --baseline benchmarks/results/anterior.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import CATEGORIES, WORDS, write_catalogue  # noqa: E402
+
+ROUTES = {
+    'books': lambda rng, rows: '/api/v1/books',
+    'books_id': lambda rng, rows: f'/api/v1/books/{rng.randint(1, rows)}',
+    'search': lambda rng, rows: f'/api/v1/books/search?q={rng.choice(WORDS)}&limit=50',
+    'search_all': lambda rng, rows: '/api/v1/books/search',
+    'search_category': lambda rng, rows: (
+        f'/api/v1/books/search?title={rng.choice(WORDS)}&category={rng.randrange(CATEGORIES)}&limit=50'
+    ),
+    'price_range': lambda rng, rows: (
+        lambda low: f'/api/v1/books/price-range?min={low}&max={low + 5}&limit=100'
+    )(rng.randint(10, 55)),
+    'top_rated': lambda rng, rows: f'/api/v1/books/top-rated?limit=100&offset={rng.randrange(1000)}',
+    'categories': lambda rng, rows: '/api/v1/categories',
+    'stats_overview': lambda rng, rows: '/api/v1/stats/overview',
+    'stats_categories': lambda rng, rows: '/api/v1/stats/categories',
+    'facets': lambda rng, rows: f'/api/v1/books/facets?q={rng.choice(WORDS)}',
+}
+# Catálogo inteiro em uma resposta; só roda quando pedida em --routes
+FULL_ROUTES = {'search_all'}
+
+
+def serve(path, snapshot):
+    """Processo filho: sobe a API com o catálogo `path` e informa a porta."""
+    from werkzeug.serving import make_server
+
+    os.chdir(ROOT)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    import config
+    config.CATALOGUE_PATH = path
+    config.CATALOGUE_SNAPSHOT = snapshot
+    config.CATALOGUE_CHECK_INTERVAL = 0
+    config.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    config.HEALTH_UPSTREAM_URL = 'http://127.0.0.1:9/'                        # Sem rede externa
+    config.HEALTH_CHECK_INTERVAL = 3600
+    import app as api
+
+    server = make_server('127.0.0.1', 0, api.app, threaded=True)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def peak_memory(pid):
+    """Pico de RSS (VmHWM) do processo, em MB."""
+    with open(f'/proc/{pid}/status', 'r') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+
+
+def reset_peak_memory(pid):
+    try:
+        with open(f'/proc/{pid}/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass                                                                     # Sem permissão: o pico vira acumulado
+
+
+def run_route(base, name, urls, concurrency, pid):
+    local = threading.local()
+
+    def get(url):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        response = session.get(base + url)
+        response.content
+        return time.perf_counter() - started, response.status_code
+
+    get(urls[0])                                                                 # Aquecimento, fora da medição
+    reset_peak_memory(pid)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(get, urls))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, _ in results]
+    return {
+        'route': name,
+        'requests': len(results),
+        'errors': sum(1 for _, status in results if status >= 400),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'throughput': len(results) / elapsed,
+        'peak_rss_mb': peak_memory(pid),
+    }
+
+
+def bench(path, snapshot, rows, routes, requests_per_route, concurrency, seed):
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', path, snapshot or ''],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        base = f'http://127.0.0.1:{server.stdout.readline().strip()}'
+        while requests.get(base + '/api/v1/health/ready').status_code != 200:
+            time.sleep(0.1)
+        rng = random.Random(seed)
+        results = []
+        for name in routes:
+            urls = [ROUTES[name](rng, rows) for _ in range(requests_per_route)]
+            result = {'rows': rows, **run_route(base, name, urls, concurrency, server.pid)}
+            results.append(result)
+            print(f'{rows:>8} {name:<17} {result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} {result["p99_ms"]:>8.1f} '
+                  f'{result["throughput"]:>9.1f} {result["peak_rss_mb"]:>9.1f} {result["errors"]:>6}')
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['rows'], r['route']): r for r in json.load(f)['results']}
+    print(f'\nComparação com {baseline_path} (razão atual / anterior)')
+    print(f'{"livros":>8} {"rota":<17} {"p95":>8} {"vazão":>8}')
+    for result in results:
+        before = baseline.get((result['rows'], result['route']))
+        if before:
+            print(f'{result["rows"]:>8} {result["route"]:<17} {result["p95_ms"] / before["p95_ms"]:>8.2f} '
+                  f'{result["throughput"] / before["throughput"]:>8.2f}')
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        return serve(sys.argv[2], sys.argv[3] or None)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', nargs='+', type=int, default=[1000, 100000, 1000000])
+    parser.add_argument('--routes', nargs='+', choices=ROUTES, default=[route for route in ROUTES if route not in FULL_ROUTES],
+                        help='Rotas medidas (search_all, a busca vazia com o catálogo inteiro, só se for listada)')
+    parser.add_argument('--requests', type=int, default=200, help='Requisições por rota')
+    parser.add_argument('--concurrency', type=int, default=8, help='Clientes simultâneos')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--snapshot', action='store_true', help='Carrega o catálogo do snapshot colunar em vez do CSV')
+    parser.add_argument('--workdir', default=os.path.join(ROOT, 'benchmarks', 'data'),
+                        help='Onde ficam os catálogos sintéticos (reaproveitados entre execuções)')
+    parser.add_argument('--output', default=None,
+                        help='Arquivo JSON de saída (padrão: benchmarks/results/api-<commit>-<horário>.json)')
+    parser.add_argument('--baseline', default=None, help='JSON de uma execução anterior para comparar')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    commit = git_commit()
+    print(f'CPUs: {os.cpu_count()}, clientes: {args.concurrency}, commit: {commit}')
+    print(f'{"livros":>8} {"rota":<17} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"req/s":>9} {"pico MB":>9} {"erros":>6}')
+    results = []
+    for rows in args.rows:
+        path = os.path.join(args.workdir, f'catalogue_{rows}.csv')
+        if not os.path.exists(path):
+            write_catalogue(path, rows, args.seed)
+        snapshot = None
+        if args.snapshot:
+            from catalogue import build_snapshot, snapshot_path
+            build_snapshot(path)
+            snapshot = snapshot_path(path)
+        results += bench(path, snapshot, rows, args.routes, args.requests, args.concurrency, args.seed)
+
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f'api-{commit or "sem-commit"}-{time.strftime("%Y%m%d-%H%M%S")}.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    report = {
+        'commit': commit,
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'concurrency': args.concurrency,
+        'snapshot': args.snapshot,
+        'requests_per_route': args.requests,
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'Resultados gravados em {output}')
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""Benchmark dos modos de execução WSGI e ASGI com muitas conexões keep-alive.
+
+Para cada modo, sobe a API em um processo separado (HTTP em 127.0.0.1, com
+um catálogo sintético) e abre `--connections` conexões HTTP/1.1 keep-alive,
+cada uma repetindo requisições às rotas de leitura durante `--duration`
+segundos. Opcionalmente mantém `--idle` conexões abertas sem uso, como
+clientes parados no keep-alive. Informa latência p50/p95/p99, vazão, erros,
+o número de threads e o pico de memória do servidor.
+
+O modo wsgi é o servidor com uma thread por conexão usado por `app.run`; o
+modo asgi é o `asgi:application` sob o uvicorn. O cliente usa asyncio puro,
+então um único processo mantém milhares de conexões.
+
+    python benchmarks/bench_asgi.py --connections 10 100 1000 --idle 2000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import WORDS, write_catalogue  # noqa: E402
+
+ROUTES = [
+    lambda rng, rows: f'/api/v1/books/{rng.randint(1, rows)}',
+    lambda rng, rows: f'/api/v1/books/search?q={quote(rng.choice(WORDS))}&limit=20',
+    lambda rng, rows: f'/api/v1/books/top-rated?limit=20&offset={rng.randrange(1000)}',
+    lambda rng, rows: (lambda low: f'/api/v1/books/price-range?min={low}&max={low + 1}&limit=20')(rng.randint(10, 55)),
+    lambda rng, rows: '/api/v1/health/ready',
+]
+
+
+def serve(mode, path):
+    """Processo filho: sobe a API no modo `mode` com o catálogo `path` e informa a porta."""
+    os.chdir(ROOT)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    import config
+    config.CATALOGUE_PATH = path
+    config.CATALOGUE_SNAPSHOT = None
+    config.CATALOGUE_CHECK_INTERVAL = 0
+    config.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    config.HEALTH_UPSTREAM_URL = 'http://127.0.0.1:9/'                        # Sem rede externa
+    config.HEALTH_CHECK_INTERVAL = 3600
+
+    if mode == 'wsgi':
+        from werkzeug.serving import make_server
+        import app as api
+
+        server = make_server('127.0.0.1', 0, api.app, threaded=True)
+        server.socket.listen(4096)
+        print(server.server_port, flush=True)
+        server.serve_forever()
+    else:
+        import uvicorn
+        import asgi
+
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        print(sock.getsockname()[1], flush=True)
+        uvicorn.Server(uvicorn.Config(asgi.application, log_level='warning', backlog=4096)).run(sockets=[sock])
+
+
+async def fetch(reader, writer, url):
+    """Faz um GET na conexão e devolve o status e se o servidor a fechou (lê o corpo inteiro)."""
+    writer.write(f'GET {url} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n'.encode())
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection') == 'close'
+
+
+
+async def client(port, rows, seed, deadline, latencies, errors, connects):
+    rng = random.Random(seed)
+    connection = None
+    while time.perf_counter() < deadline:
+        try:
+            if connection is None:
+                started = time.perf_counter()
+                connection = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), 10)
+                connects.append(1)
+            else:
+                started = time.perf_counter()
+            status, closed = await asyncio.wait_for(fetch(*connection, rng.choice(ROUTES)(rng, rows)), 30)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(status)
+            if closed:
+                # O servidor WSGI do werkzeug fecha a conexão a cada resposta
+                connection[1].close()
+                connection = None
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if connection is not None:
+                connection[1].close()
+            connection = None
+            await asyncio.sleep(0.1)
+    if connection is not None:
+        connection[1].close()
+
+
+async def sample_threads(pid, peak):
+    """Guarda em `peak[0]` o maior número de threads do servidor até ser cancelada."""
+    while True:
+        peak[0] = max(peak[0], server_status(pid)[0])
+        await asyncio.sleep(0.5)
+
+
+async def load(pid, port, rows, connections, idle, duration):
+    idle_connections = []
+    for _ in range(idle):
+        try:
+            idle_connections.append(await asyncio.open_connection('127.0.0.1', port))
+        except OSError:
+            break
+    latencies, errors, connects, threads = [], [], [], [0]
+    sampler = asyncio.create_task(sample_threads(pid, threads))
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        client(port, rows, seed, started + duration, latencies, errors, connects) for seed in range(connections)
+    ])
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    for _, writer in idle_connections:
+        writer.close()
+    return latencies, errors, len(connects), elapsed, len(idle_connections), threads[0]
+
+
+def server_status(pid):
+    """Threads e pico de RSS (MB) do processo servidor."""
+    status = {}
+    with open(f'/proc/{pid}/status', 'r') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            status[key] = value.strip()
+    return int(status['Threads']), int(status['VmHWM'].split()[0]) / 1024
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else float('nan')
+
+
+def wait_ready(port, rows):
+    """Espera o catálogo carregar e faz uma requisição a cada rota (aquecimento, fora da medição)."""
+    for _ in range(600):
+        try:
+            with socket.create_connection(('127.0.0.1', port)) as sock:
+                sock.sendall(b'GET /api/v1/health/ready HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n')
+                if sock.recv(64).startswith(b'HTTP/1.1 200'):
+                    break
+        except OSError:
+            pass
+        time.sleep(0.1)
+    else:
+        raise RuntimeError('servidor não respondeu')
+
+    async def warm():
+        rng = random.Random(0)
+        for route in ROUTES:
+            _, writer = connection = await asyncio.open_connection('127.0.0.1', port)
+            await fetch(*connection, route(rng, rows))
+            writer.close()
+
+    asyncio.run(warm())
+
+
+def run(mode, path, rows, connections, args):
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', mode, path],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        port = int(server.stdout.readline().strip())
+        wait_ready(port, rows)
+        latencies, errors, connects, elapsed, idle, threads = asyncio.run(
+            load(server.pid, port, rows, connections, args.idle, args.duration)
+        )
+        peak = server_status(server.pid)[1]
+        return {
+            'mode': mode,
+            'connections': connections,
+            'idle': idle,
+            'requests': len(latencies),
+            'errors': len(errors),
+            'connects': connects,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'throughput': len(latencies) / elapsed,
+            'server_threads': threads,
+            'peak_rss_mb': peak,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        return serve(sys.argv[2], sys.argv[3])
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+    parser.add_argument('--connections', nargs='+', type=int, default=[10, 100, 1000],
+                        help='Conexões keep-alive fazendo requisições')
+    parser.add_argument('--idle', type=int, default=0, help='Conexões keep-alive abertas sem uso durante a medição')
+    parser.add_argument('--duration', type=float, default=10.0, help='Segundos de carga por configuração')
+    parser.add_argument('--rows', type=int, default=100000, help='Livros do catálogo sintético')
+    parser.add_argument('--workdir', default=os.path.join(ROOT, 'benchmarks', 'data'),
+                        help='Onde ficam os catálogos sintéticos (reaproveitados entre execuções)')
+    parser.add_argument('--output', default=None, help='Grava os resultados em JSON')
+    args = parser.parse_args(argv)
+
+    # Cada conexão é um descritor no cliente e outro no servidor
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    os.makedirs(args.workdir, exist_ok=True)
+    path = os.path.join(args.workdir, f'catalogue_{args.rows}.csv')
+    if not os.path.exists(path):
+        write_catalogue(path, args.rows, 0)
+
+    print(f'CPUs: {os.cpu_count()}, livros: {args.rows}, conexões ociosas: {args.idle}, {args.duration:.0f}s por configuração')
+    print(f'{"modo":<5} {"conexões":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"req/s":>8} {"erros":>6} '
+          f'{"reconexões":>11} {"threads":>8} {"pico MB":>8}')
+    report = []
+    for connections in args.connections:
+        for mode in args.modes:
+            result = run(mode, path, args.rows, connections, args)
+            report.append(result)
+            print(f'{mode:<5} {connections:>9} {result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+                  f'{result["p99_ms"]:>8.1f} {result["throughput"]:>8.1f} {result["errors"]:>6} {result["connects"]:>11} '
+                  f'{result["server_threads"]:>8} {result["peak_rss_mb"]:>8.1f}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Micro-benchmark de /api/v1/books/<id>.
+
+Compara a consulta original (`df.query` a cada requisição) com o índice
+montado na carga do catálogo, passando pelo cliente de testes do Flask.
+
+    python benchmarks/bench_books_id.py --requests 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from flask import jsonify  # noqa: E402
+
+import app as api  # noqa: E402
+from catalogue import read_catalogue  # noqa: E402
+
+df = read_catalogue(api.app.config["CATALOGUE_PATH"])
+
+
+def legacy_books_id(id):
+    id = int(id)
+    book_id = df.query("Index == @id")
+    return jsonify(book_id.to_dict(orient="records"))
+
+
+def run(client, prefix, ids):
+    started = time.perf_counter()
+    for id in ids:
+        client.get(f'{prefix}/{id}')
+    return len(ids) / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    api.app.add_url_rule('/bench/legacy/books/<id>', view_func=legacy_books_id)
+    client = api.app.test_client()
+    ids = random.choices(df['Index'].tolist(), k=args.requests)
+
+    legacy = run(client, '/bench/legacy/books', ids)
+    indexed = run(client, '/api/v1/books', ids)
+    print(f'{len(df)} livros, {args.requests} requisições')
+    print(f'df.query:  {legacy:>8.0f} req/s')
+    print(f'índice:    {indexed:>8.0f} req/s ({indexed / legacy:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark do login com hash de senhas.
+
+Sobe a API em um processo separado (HTTP em 127.0.0.1, banco SQLite
+temporário), cadastra `--users` usuários e dispara `--concurrency` clientes
+fazendo login durante `--duration` segundos. Ao mesmo tempo, um cliente
+consulta /api/v1/books/<id> para mostrar quanto a rajada de logins atrasa o
+catálogo. Repete para cada tamanho do pool de hash (`--hash-workers`).
+
+    python benchmarks/bench_login.py --hash-workers 1 2 4 --concurrency 16
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+
+def serve(settings):
+    """Processo filho: sobe a API com as configurações `settings` e informa a porta."""
+    from werkzeug.serving import make_server
+
+    os.chdir(ROOT)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    import config
+    config.CATALOGUE_CHECK_INTERVAL = 0
+    config.HEALTH_UPSTREAM_URL = 'http://127.0.0.1:9/'
+    for key, value in settings.items():
+        setattr(config, key, value)
+    import app as api
+
+    with api.app.app_context():
+        api.db.create_all()
+    server = make_server('127.0.0.1', 0, api.app, threaded=True)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else float('nan')
+
+
+def catalogue_latencies(base, stop):
+    """Latências de /api/v1/books/<id> até `stop` ser sinalizado."""
+    session = requests.Session()
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        session.get(f'{base}/api/v1/books/{random.randint(1, 1000)}').content
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.01)
+    return latencies
+
+
+def catalogue_latencies_for(base, seconds):
+    stop = threading.Event()
+    threading.Timer(seconds, stop.set).start()
+    return catalogue_latencies(base, stop)
+
+
+def run(hash_workers, args):
+    database = os.path.join(tempfile.mkdtemp(), 'bench_login.db')
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+        'AUTH_HASH_WORKERS': hash_workers,
+        'AUTH_HASH_MAX_PENDING': args.max_pending,
+    }
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', json.dumps(settings)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        base = f'http://127.0.0.1:{server.stdout.readline().strip()}'
+        users = [(f'user{i}', f'senha{i}') for i in range(args.users)]
+        for username, password in users:
+            requests.post(f'{base}/api/v1/auth/register', json={'username': username, 'password': password})
+
+        stop = threading.Event()
+        idle = catalogue_latencies_for(base, 1.0)
+        with ThreadPoolExecutor(1) as probe:
+            during = probe.submit(catalogue_latencies, base, stop)
+            counts = {'ok': 0, 'busy': 0, 'other': 0}
+            lock = threading.Lock()
+            deadline = time.perf_counter() + args.duration
+
+            def client():
+                session = requests.Session()
+                while time.perf_counter() < deadline:
+                    username, password = random.choice(users)
+                    status = session.post(f'{base}/api/v1/auth/login',
+                                          json={'username': username, 'password': password}).status_code
+                    with lock:
+                        counts['ok' if status == 200 else 'busy' if status == 503 else 'other'] += 1
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(args.concurrency) as pool:
+                for _ in range(args.concurrency):
+                    pool.submit(client)
+            elapsed = time.perf_counter() - started
+            stop.set()
+            during = during.result()
+        return {
+            'hash_workers': hash_workers,
+            'logins_per_sec': counts['ok'] / elapsed,
+            'rejected': counts['busy'],
+            'errors': counts['other'],
+            'catalogue_p50_idle_ms': percentile(idle, 0.5) * 1000,
+            'catalogue_p95_idle_ms': percentile(idle, 0.95) * 1000,
+            'catalogue_p50_ms': percentile(during, 0.5) * 1000,
+            'catalogue_p95_ms': percentile(during, 0.95) * 1000,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        return serve(json.loads(sys.argv[2]))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hash-workers', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--concurrency', type=int, default=16, help='Clientes fazendo login ao mesmo tempo')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=10.0, help='Segundos de login por configuração')
+    parser.add_argument('--max-pending', type=int, default=2, help='AUTH_HASH_MAX_PENDING do servidor')
+    parser.add_argument('--output', default=None, help='Grava os resultados em JSON')
+    args = parser.parse_args(argv)
+
+    print(f'CPUs: {os.cpu_count()}, clientes: {args.concurrency}, {args.duration:.0f}s por configuração')
+    print(f'{"pool":>5} {"logins/s":>9} {"503":>6} {"catálogo p50/p95 ocioso":>24} {"durante logins":>16}')
+    report = []
+    for hash_workers in args.hash_workers:
+        result = run(hash_workers, args)
+        report.append(result)
+        print(f'{hash_workers:>5} {result["logins_per_sec"]:>9.1f} {result["rejected"]:>6} '
+              f'{result["catalogue_p50_idle_ms"]:>10.1f} / {result["catalogue_p95_idle_ms"]:>7.1f} ms '
+              f'{result["catalogue_p50_ms"]:>6.1f} / {result["catalogue_p95_ms"]:>6.1f} ms')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark do parsing das páginas de produto.
+
+Faz o parsing de um diretório de páginas salvas (*.html, recursivo) com cada
+backend disponível e cada número de processos, e informa páginas/s.
+
+    python benchmarks/bench_parse.py caminho/das/paginas --workers 1 2 4
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scraping import BACKENDS, ParserPool  # noqa: E402
+
+
+def load_pages(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '**', '*.html'), recursive=True)):
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        if 'product_page' in html:                                                # Ignora páginas de listagem
+            pages.append((path, html))
+    return pages
+
+
+def run(pages, backend, workers, repeat):
+    items = pages * repeat
+    with ParserPool(workers, backend) as pool:
+        started = time.perf_counter()
+        errors = sum(1 for _, _, error in pool.parse_all(items) if error)
+        elapsed = time.perf_counter() - started
+    return len(items) / elapsed, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--workers', nargs='+', type=int, default=sorted({1, 2, os.cpu_count()}))
+    parser.add_argument('--repeat', type=int, default=1, help='Repete o conjunto de páginas N vezes')
+    args = parser.parse_args(argv)
+
+    pages = load_pages(args.directory)
+    if not pages:
+        sys.exit(f'Nenhuma página de produto encontrada em {args.directory}')
+    print(f'{len(pages) * args.repeat} páginas, CPUs: {os.cpu_count()}')
+    print(f'{"backend":<12} {"workers":>7} {"páginas/s":>10} {"erros":>6}')
+    for backend in args.backends:
+        for workers in args.workers:
+            rate, errors = run(pages, backend, workers, args.repeat)
+            print(f'{backend:<12} {workers:>7} {rate:>10.1f} {errors:>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark da partida da API: CSV x snapshot colunar.
+
+Para cada tamanho de catálogo sintético, sobe `--workers` processos que
+importam o app (como workers do gunicorn), fazem uma primeira requisição a
+/api/v1/books/<id> e ficam vivos até todos terminarem, para que a memória
+compartilhada entre eles apareça na medição. Informa o tempo até a primeira
+resposta e, por worker, o RSS, o PSS (páginas compartilhadas divididas entre
+os processos) e a memória privada suja (heap do processo).
+
+    python benchmarks/bench_startup.py --rows 1000 100000 1000000 --workers 2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import write_catalogue  # noqa: E402
+
+
+def memory():
+    """RSS, PSS e memória privada suja do processo atual, em MB."""
+    values = {}
+    with open('/proc/self/smaps_rollup', 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {'rss': values['Rss'], 'pss': values['Pss'], 'private': values['Private_Dirty']}
+
+
+def worker(path, snapshot, book_id, spawned):
+    """Processo filho: carrega o app, responde uma requisição e informa as medidas."""
+    os.chdir(ROOT)
+    import config
+    config.CATALOGUE_PATH = path
+    config.CATALOGUE_SNAPSHOT = snapshot
+    config.CATALOGUE_CHECK_INTERVAL = 0
+    config.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    config.HEALTH_UPSTREAM_URL = 'http://127.0.0.1:9/'                        # Sem rede externa
+    config.HEALTH_CHECK_INTERVAL = 3600
+    import app as api
+
+    response = api.app.test_client().get(f'/api/v1/books/{book_id}')
+    assert response.status_code == 200, response.status_code
+    result = {'first_request': time.time() - spawned, **memory()}
+    print(json.dumps(result), flush=True)
+    sys.stdin.read()                                                             # Espera os outros workers
+
+
+def run(path, snapshot, workers, book_id):
+    started = time.perf_counter()
+    processes = []
+    for _ in range(workers):
+        # O tempo até a primeira resposta conta a partir do disparo do processo
+        command = [sys.executable, os.path.abspath(__file__), '--worker', path, snapshot or '', str(book_id),
+                   repr(time.time())]
+        processes.append(subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True))
+    results = [json.loads(process.stdout.readline()) for process in processes]
+    wall = time.perf_counter() - started
+    for process in processes:
+        process.stdin.close()
+        process.wait()
+    return wall, results
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        _, _, path, snapshot, book_id, spawned = sys.argv
+        return worker(path, snapshot or None, int(book_id), float(spawned))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', nargs='+', type=int, default=[1000, 100000, 1000000])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--workdir', default=os.path.join(ROOT, 'benchmarks', 'data'),
+                        help='Onde ficam os catálogos sintéticos (reaproveitados entre execuções)')
+    parser.add_argument('--output', default=None, help='Grava os resultados em JSON')
+    args = parser.parse_args(argv)
+
+    from catalogue import build_snapshot, snapshot_path
+
+    os.makedirs(args.workdir, exist_ok=True)
+    report = []
+    print(f'{"livros":>8} {"carga":<9} {"1ª resp. (s)":>12} {"RSS (MB)":>9} {"PSS (MB)":>9} {"privada (MB)":>12}')
+    for rows in args.rows:
+        path = os.path.join(args.workdir, f'catalogue_{rows}.csv')
+        if not os.path.exists(path):
+            write_catalogue(path, rows)
+        build_snapshot(path)
+        for mode, snapshot in (('csv', None), ('snapshot', snapshot_path(path))):
+            wall, results = run(path, snapshot, args.workers, rows // 2 + 1)
+            average = {key: sum(result[key] for result in results) / len(results) for key in results[0]}
+            report.append({'rows': rows, 'mode': mode, 'workers': args.workers, 'wall': wall, **average})
+            print(f'{rows:>8} {mode:<9} {average["first_request"]:>12.2f} {average["rss"]:>9.1f} '
+                  f'{average["pss"]:>9.1f} {average["private"]:>12.1f}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""Benchmark do modo de produção com gunicorn: vazão e memória por número de workers.
+
+Para cada número de workers, sobe a API com o gunicorn.conf.py (gthread) em
+um processo separado, com um catálogo sintético, e mede durante `--duration`
+segundos as rotas de leitura com `--connections` conexões keep-alive (o mesmo
+cliente asyncio do bench_asgi.py). Informa latência p50/p95/p99, vazão e, por
+worker, o RSS, o PSS (páginas compartilhadas divididas entre os processos) e
+a memória privada suja, lidos depois da carga.
+
+No modo preload o catálogo e o índice de busca são montados uma vez no
+processo mestre e herdados pelos workers; no modo per-worker (sem preload)
+cada worker monta os seus. Com o preload, a memória privada por worker deve
+ficar estável quando o número de workers cresce.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_asgi import client, percentile, wait_ready  # noqa: E402
+from benchmarks.synthetic import write_catalogue  # noqa: E402
+
+MODES = {'preload': '1', 'per-worker': '0'}
+
+
+def serve(workers, threads, path, snapshot):
+    """Processo filho: roda o gunicorn com o catálogo `path` e informa a porta."""
+    os.chdir(ROOT)
+    import config
+    config.CATALOGUE_PATH = path
+    config.CATALOGUE_SNAPSHOT = snapshot or None
+    config.CATALOGUE_CHECK_INTERVAL = 0
+    config.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    config.HEALTH_UPSTREAM_URL = 'http://127.0.0.1:9/'                        # Sem rede externa
+    config.HEALTH_CHECK_INTERVAL = 3600
+
+    from gunicorn.app.wsgiapp import WSGIApplication
+
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    print(sock.getsockname()[1], flush=True)
+    # O gunicorn assume o socket já aberto (fd://) e o fecha ao sair
+    sys.argv = ['gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'), '--bind', f'fd://{sock.detach()}',
+                '--workers', str(workers), '--threads', str(threads), '--backlog', '4096',
+                '--log-level', 'warning', 'app:app']
+    WSGIApplication('%(prog)s [OPTIONS] [APP_MODULE]').run()
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children', 'r') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def memory(pid):
+    """RSS, PSS e memória privada suja do processo `pid`, em MB."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {'rss': values['Rss'], 'pss': values['Pss'], 'private': values['Private_Dirty']}
+
+
+async def load(port, rows, connections, duration):
+    latencies, errors, connects = [], [], []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        client(port, rows, seed, started + duration, latencies, errors, connects) for seed in range(connections)
+    ])
+    return latencies, errors, time.perf_counter() - started
+
+
+def run(mode, workers, path, snapshot, args):
+    environ = dict(os.environ, GUNICORN_PRELOAD=MODES[mode])
+    command = [sys.executable, os.path.abspath(__file__), '--serve', str(workers), str(args.threads), path,
+               snapshot or '']
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=environ)
+    try:
+        port = int(server.stdout.readline().strip())
+        wait_ready(port, args.rows)
+        # Aquecimento: no modo per-worker cada worker ainda monta o seu índice de busca na primeira busca
+        asyncio.run(load(port, args.rows, args.connections, args.warmup))
+        latencies, errors, elapsed = asyncio.run(load(port, args.rows, args.connections, args.duration))
+        master = memory(server.pid)
+        measures = [memory(pid) for pid in children(server.pid)]
+        average = {key: sum(measure[key] for measure in measures) / len(measures) for key in measures[0]}
+        return {
+            'mode': mode,
+            'workers': workers,
+            'requests': len(latencies),
+            'errors': len(errors),
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'throughput': len(latencies) / elapsed,
+            'master': master,
+            **{f'worker_{key}_mb': value for key, value in average.items()},
+            'total_pss_mb': master['pss'] + sum(measure['pss'] for measure in measures),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        _, _, workers, threads, path, snapshot = sys.argv
+        return serve(int(workers), int(threads), path, snapshot)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--threads', type=int, default=4, help='Threads por worker')
+    parser.add_argument('--connections', type=int, default=32, help='Conexões keep-alive fazendo requisições')
+    parser.add_argument('--duration', type=float, default=10.0, help='Segundos de carga por configuração')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Segundos de carga antes da medição')
+    parser.add_argument('--rows', type=int, default=100000, help='Livros do catálogo sintético')
+    parser.add_argument('--snapshot', action='store_true', help='Carrega o catálogo do snapshot colunar em vez do CSV')
+    parser.add_argument('--workdir', default=os.path.join(ROOT, 'benchmarks', 'data'),
+                        help='Onde ficam os catálogos sintéticos (reaproveitados entre execuções)')
+    parser.add_argument('--output', default=None, help='Grava os resultados em JSON')
+    args = parser.parse_args(argv)
+
+    from catalogue import build_snapshot, snapshot_path
+
+    os.makedirs(args.workdir, exist_ok=True)
+    path = os.path.join(args.workdir, f'catalogue_{args.rows}.csv')
+    if not os.path.exists(path):
+        write_catalogue(path, args.rows, 0)
+    snapshot = None
+    if args.snapshot:
+        build_snapshot(path)
+        snapshot = snapshot_path(path)
+
+    print(f'CPUs: {os.cpu_count()}, livros: {args.rows}, conexões: {args.connections}, '
+          f'{args.threads} threads por worker, {args.duration:.0f}s por configuração')
+    print(f'{"modo":<10} {"workers":>7} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"req/s":>8} {"erros":>6} '
+          f'{"RSS/w MB":>9} {"PSS/w MB":>9} {"priv/w MB":>10} {"PSS total":>10}')
+    report = []
+    for mode in args.modes:
+        for workers in args.workers:
+            result = run(mode, workers, path, snapshot, args)
+            report.append(result)
+            print(f'{mode:<10} {workers:>7} {result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+                  f'{result["p99_ms"]:>8.1f} {result["throughput"]:>8.1f} {result["errors"]:>6} '
+                  f'{result["worker_rss_mb"]:>9.1f} {result["worker_pss_mb"]:>9.1f} '
+                  f'{result["worker_private_mb"]:>10.1f} {result["total_pss_mb"]:>10.1f}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
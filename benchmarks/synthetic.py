@@ -0,0 +1,64 @@
+"""Catálogos sintéticos no formato do data/web_scraping.csv, para os benchmarks.
+
+    python benchmarks/synthetic.py saida.csv --rows 100000
+"""
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scraping import FIELDNAMES  # noqa: E402
+
+CATEGORIES = 50
+WORDS = [
+    'light', 'python', 'mystery', 'love', 'history', 'night', 'house', 'secret', 'garden', 'world',
+    'shadow', 'river', 'stone', 'journey', 'music', 'winter', 'summer', 'city', 'dream', 'story',
+    'poetry', 'travel', 'science', 'fiction', 'crime', 'horror', 'fantasy', 'romance', 'family', 'war',
+    'ocean', 'mountain', 'queen', 'king', 'empire', 'ghost', 'heart', 'fire', 'water', 'book',
+    'árvore', 'coração', 'canção', 'memória', 'viagem', 'noite', 'casa', 'jardim', 'cidade', 'sonho',
+]
+
+
+def write_catalogue(path, rows, seed=0, description_words=150, chunk=10000):
+    """Grava um catálogo com `rows` livros; o mesmo `seed` gera o mesmo arquivo."""
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS, dtype=object)
+    categories = [f'{WORDS[i % len(WORDS)].title()} {i}' for i in range(CATEGORIES)]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
+        for start in range(0, rows, chunk):
+            n = min(chunk, rows - start)
+            titles = words[rng.integers(0, len(WORDS), size=(n, 4))]
+            descriptions = words[rng.integers(0, len(WORDS), size=(n, description_words))]
+            category = rng.integers(0, CATEGORIES, size=n)
+            price = rng.integers(1000, 6000, size=n) / 100
+            stock = rng.integers(0, 30, size=n)
+            rating = rng.integers(1, 6, size=n)
+            for i in range(n):
+                index = start + i + 1
+                link = f'https://books.toscrape.com/catalogue/book-{index}/index.html'
+                writer.writerow([
+                    ' '.join(titles[i]).title(), categories[category[i]], f'{price[i]:.2f}', stock[i],
+                    f'https://books.toscrape.com/media/cache/{index}.jpg', rating[i], link,
+                    ' '.join(descriptions[i]), index,
+                ])
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--description-words', type=int, default=150)
+    args = parser.parse_args(argv)
+    write_catalogue(args.path, args.rows, args.seed, args.description_words)
+
+
+if __name__ == '__main__':
+    main()
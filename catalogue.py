@@ -0,0 +1,398 @@
+"""Catálogo de livros carregado uma única vez a partir do CSV do scraping.
+
+O CSV é lido com tipos explícitos e compactos, e o resultado vira um snapshot
+somente leitura com as estruturas derivadas (índice por Index, índice de
+busca e estatísticas). Os endpoints apenas leem o snapshot; nenhuma
+requisição altera as colunas, então ele pode ser compartilhado entre threads
+sem locks. Cada snapshot tem uma versão derivada do arquivo de origem, e
+`CatalogueStore` troca o snapshot quando o arquivo muda.
+
+Quando existe um snapshot colunar (`columnar.py`) da mesma versão do CSV, as
+colunas são abertas dele com memory-map em vez de ler o CSV.
+"""
+import functools
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from columnar import load_snapshot, write_snapshot
+from search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+DTYPES = {
+    "Title": "object",
+    "Category": "category",
+    "Price": "float32",
+    "Stock": "int32",
+    "Image": "object",
+    "Rating": "int8",
+    "Link": "object",
+    "Description": "object",
+    "Index": "int32",
+}
+BOOK_CACHE_SIZE = 4096  # respostas de /books/<id> serializadas mantidas por snapshot
+SORT_KEYS = ("index", "price", "rating")
+PRICE_BUCKETS = (10, 20, 30, 40, 50)  # limites das faixas de preço das facetas
+
+
+def _read_only(values):
+    values = values.view()
+    values.flags.writeable = False
+    return values
+
+
+def file_version(path):
+    """Versão do arquivo do catálogo, derivada do mtime e do tamanho."""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def read_catalogue(path):
+    """Lê o CSV do scraping com os tipos de DTYPES."""
+    return pd.read_csv(path, sep=",", dtype=DTYPES, usecols=list(DTYPES))
+
+
+def frame_columns(frame):
+    """Colunas de um DataFrame do catálogo no formato usado por `Catalogue`.
+
+    Devolve `(columns, categories)`: as colunas numéricas viram arrays
+    NumPy, Category vira os códigos de cada linha e as de texto viram arrays
+    de objetos, com None no lugar de valores ausentes.
+    """
+    columns = {}
+    for field, dtype in DTYPES.items():
+        series = frame[field]
+        if dtype == "category":
+            columns[field] = series.cat.codes.to_numpy().astype(np.int16)
+        elif dtype == "object":
+            columns[field] = series.astype(object).where(series.notna(), None).to_numpy()
+        else:
+            columns[field] = series.to_numpy()
+    return columns, frame["Category"].cat.categories.tolist()
+
+
+def build_indexes(columns):
+    """Permutações que ordenam Index e Price, e as colunas já ordenadas por elas."""
+    index_order = np.argsort(columns["Index"], kind="stable")
+    price_order = np.argsort(columns["Price"], kind="stable")
+    return {
+        "index_order": index_order,
+        "sorted_index": columns["Index"][index_order],
+        "price_order": price_order,
+        "sorted_price": columns["Price"][price_order],
+    }
+
+
+def aggregate(categories, codes, rating, price, stock, price_buckets=PRICE_BUCKETS):
+    """Facetas de um conjunto de livros, calculadas em uma passada vetorizada.
+
+    `codes` são os códigos de categoria de cada livro (posições em
+    `categories`, ou -1 sem categoria); as contagens e somas saem de
+    `np.bincount`, sem agrupar linha a linha.
+    """
+    size = len(codes)
+    # Código -1: livro sem categoria, contado no total mas fora da lista de categorias
+    known = codes >= 0
+    counts = np.bincount(codes[known], minlength=len(categories))
+    rating_sums = np.bincount(codes[known], weights=rating[known], minlength=len(categories))
+    ratings = np.bincount(rating, minlength=6)
+    buckets = np.bincount(np.searchsorted(price_buckets, price, side="right"), minlength=len(price_buckets) + 1)
+    bounds = (0,) + tuple(price_buckets)
+    return {
+        "Number of Books": size,
+        "Stock": int(stock.sum(dtype=np.int64)),
+        "Average Rating": float(round(rating.mean(dtype=np.float64), 2)) if size else 0.0,
+        "Average Price": float(round(price.mean(dtype=np.float64), 2)) if size else 0.0,
+        "Categories": [
+            {"Category": name, "Number_of_Books": int(count), "Avg_Rating": float(total / count)}
+            for name, count, total in zip(categories, counts, rating_sums)
+            if count
+        ],
+        "Ratings": {str(value): int(count) for value, count in enumerate(ratings) if value or count},
+        "Price Buckets": [
+            {"min": low, "max": high, "count": int(count)}
+            for low, high, count in zip(bounds, tuple(price_buckets) + (None,), buckets)
+        ],
+    }
+
+
+OVERVIEW_KEYS = ("Stock", "Average Rating", "Average Price", "Number of Books")
+
+
+def _values(column, rows):
+    values = column.take(rows)
+    return values if isinstance(values, list) else values.tolist()
+
+
+class Catalogue:
+    """Snapshot imutável do catálogo e das estruturas derivadas dele.
+
+    As colunas podem vir do CSV (arrays em memória) ou de um snapshot
+    colunar aberto com memory-map (`columnar.load_snapshot`); em ambos os
+    casos nada é copiado aqui. O índice de busca é montado na primeira
+    busca, ou antes, por quem chamar `warm()`.
+    """
+
+    def __init__(self, columns, categories, dumps, source=None, version=None, indexes=None):
+        self.data = columns
+        self.dumps = dumps
+        self.source = source
+        self.version = version
+        self.loaded_at = time.time()
+        self.columns = list(columns)
+        self.categories = list(categories)
+        self.size = len(columns["Index"])
+        self.category_codes = _read_only(columns["Category"])
+        self.price = _read_only(columns["Price"])
+        self.rating = _read_only(columns["Rating"])
+        self.stock = _read_only(columns["Stock"])
+        # Index e Price ordenados e a linha de cada valor, para buscas binárias
+        indexes = indexes or build_indexes(columns)
+        self.index_order = _read_only(indexes["index_order"])
+        self.sorted_index = _read_only(indexes["sorted_index"])
+        self.price_order = _read_only(indexes["price_order"])
+        self.sorted_price = _read_only(indexes["sorted_price"])
+        # O None do fim é o nome do código -1 (livro sem categoria)
+        self._category_names = np.array(self.categories + [None], dtype=object)
+        self._search_index = None
+        self._search_lock = threading.Lock()
+        self.book_json = functools.lru_cache(maxsize=BOOK_CACHE_SIZE)(self._book_json)
+        # Facetas do catálogo inteiro; as estatísticas gerais e por categoria saem delas
+        self.all_facets = aggregate(self.categories, self.category_codes, self.rating, self.price, self.stock)
+        self.overview = {key: self.all_facets[key] for key in OVERVIEW_KEYS}
+        self.category_stats = self.all_facets["Categories"]
+
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            with self._search_lock:
+                if self._search_index is None:
+                    self._search_index = SearchIndex({
+                        "Title": self.data["Title"],
+                        "Category": self._category_names.take(self.category_codes),
+                        "Description": self.data["Description"],
+                    })
+        return self._search_index
+
+    def warm(self):
+        """Monta o índice de busca agora, fora do caminho das requisições."""
+        self.search_index
+        return self
+
+    def titles(self):
+        return _values(self.data["Title"], np.arange(self.size))
+
+    def row(self, index):
+        """Linha do livro com este Index, ou None."""
+        limits = np.iinfo(self.sorted_index.dtype)
+        if not limits.min <= index <= limits.max:
+            return None
+        position = int(np.searchsorted(self.sorted_index, index))
+        if position < self.size and self.sorted_index[position] == index:
+            return int(self.index_order[position])
+        return None
+
+    def _book_json(self, index):
+        row = self.row(index)
+        if row is None:
+            return None
+        return self.dumps(self.records([row]), separators=(",", ":"))
+
+    def search(self, q="", title="", category=""):
+        """Linhas que atendem a busca; com `q` ou `title`, ordenadas por relevância."""
+        rows = None
+        if q:
+            rows = self.search_index.search(q)
+        if title:
+            title_rows = self.search_index.search(title, fields=["Title"])
+            if rows is None:
+                rows = title_rows
+            else:
+                title_rows = set(title_rows)
+                rows = [row for row in rows if row in title_rows]
+        if category:
+            in_category = self.category_filter(category)
+            if rows is None:
+                rows = np.flatnonzero(in_category)
+            else:
+                rows = [row for row in rows if in_category[row]]
+        if rows is None:
+            rows = range(self.size)
+        return rows
+
+    def matching_categories(self, text):
+        """Códigos das categorias cujo nome contém `text`, sem diferenciar maiúsculas."""
+        text = text.lower()
+        return [code for code, name in enumerate(self.categories) if text in name.lower()]
+
+    def category_filter(self, text):
+        """Máscara das linhas cuja categoria contém `text`."""
+        return np.isin(self.category_codes, self.matching_categories(text))
+
+    def top_rated(self):
+        return np.flatnonzero(self.rating == 5)
+
+    def facets(self, q="", title="", category=""):
+        """Facetas dos livros que atendem a busca (as do catálogo inteiro, sem filtros)."""
+        if not (q or title or category):
+            return self.all_facets
+        rows = np.asarray(self.search(q, title, category), dtype=np.intp)
+        return aggregate(
+            self.categories, self.category_codes[rows], self.rating[rows], self.price[rows], self.stock[rows]
+        )
+
+    def price_range(self, min_price=None, max_price=None, category="", rating=None, sort=None, descending=False):
+        """Linhas com preço entre `min_price` e `max_price`, opcionalmente filtradas e ordenadas.
+
+        A faixa sai do preço pré-ordenado por busca binária, já na ordem de
+        preço; categoria e nota são testadas só nas linhas da faixa. Sem
+        `sort`, a ordem é a do catálogo.
+        """
+        # Os limites são comparados em float32, o mesmo tipo da coluna Price
+        start = 0 if min_price is None else np.searchsorted(self.sorted_price, np.float32(min_price), "left")
+        stop = self.size if max_price is None else np.searchsorted(self.sorted_price, np.float32(max_price), "right")
+        rows = self.price_order[start:stop]
+
+        mask = None
+        if category:
+            mask = np.isin(self.category_codes[rows], self.matching_categories(category))
+        if rating is not None:
+            in_rating = self.rating[rows] == rating
+            mask = in_rating if mask is None else mask & in_rating
+        if mask is not None:
+            rows = rows[mask]
+
+        if sort != "price":
+            rows = self._catalogue_order(rows)
+            if sort == "rating":
+                rows = rows[np.argsort(self.rating[rows], kind="stable")]
+            elif sort == "index":
+                rows = rows[np.argsort(self.data["Index"][rows], kind="stable")]
+        return rows[::-1] if descending else rows
+
+    def _catalogue_order(self, rows):
+        if len(rows) > self.size // 8:
+            # Faixas grandes: marcar as linhas sai mais barato que ordená-las
+            selected = np.zeros(self.size, dtype=bool)
+            selected[rows] = True
+            return np.flatnonzero(selected)
+        return np.sort(rows)
+
+    def records(self, rows, columns=None):
+        """Linhas `rows` como dicionários prontos para JSON."""
+        columns = list(columns or self.columns)
+        return [dict(zip(columns, row)) for row in zip(*self.column_values(rows, columns))]
+
+    def column_values(self, rows, columns):
+        """Valores de cada coluna de `columns` nas linhas `rows`, como listas de tipos do Python."""
+        rows = np.asarray(rows, dtype=np.intp)
+        values = []
+        for field in columns:
+            if field == "Category":
+                values.append(self._category_names.take(self.category_codes.take(rows)).tolist())
+            elif field == "Price":
+                # float32 guarda 51.77 como 51.7700004...; volta para duas casas na saída
+                values.append(self.price.take(rows).astype(np.float64).round(2).tolist())
+            else:
+                values.append(_values(self.data[field], rows))
+        return values
+
+
+def snapshot_path(path):
+    """Diretório do snapshot colunar que acompanha o CSV `path`."""
+    return os.path.splitext(path)[0] + ".snapshot"
+
+
+def build_snapshot(path, snapshot=None):
+    """Converte o CSV do catálogo em um snapshot colunar e o publica."""
+    version = file_version(path)
+    columns, categories = frame_columns(read_catalogue(path))
+    return write_snapshot(snapshot or snapshot_path(path), version, columns, categories, build_indexes(columns))
+
+
+def load_catalogue(path, dumps, snapshot=None):
+    """Carrega o catálogo do snapshot colunar, se ele for da versão atual do CSV, ou do CSV."""
+    version = file_version(path)
+    if snapshot:
+        loaded = load_snapshot(snapshot, version)
+        if loaded is not None:
+            meta, columns, categories, indexes = loaded
+            return Catalogue(columns, categories, dumps, source=snapshot, version=version, indexes=indexes)
+    columns, categories = frame_columns(read_catalogue(path))
+    return Catalogue(columns, categories, dumps, source=path, version=version)
+
+
+class CatalogueStore:
+    """Guarda o snapshot atual e o troca quando o arquivo de origem muda.
+
+    O novo snapshot, com todos os índices e estatísticas, é montado fora do
+    caminho das requisições (na thread de monitoramento ou em uma recarga
+    disparada manualmente) e só então substitui o anterior em uma única
+    atribuição. Quem já pegou o snapshot antigo continua usando-o até o fim
+    da requisição; ninguém vê um catálogo pela metade.
+    """
+
+    def __init__(self, path, dumps, snapshot=None):
+        self.path = path
+        self.dumps = dumps
+        self.snapshot = snapshot
+        self.last_error = None
+        self._catalogue = load_catalogue(path, dumps, snapshot)
+        # Na partida, o índice de busca é montado em segundo plano para não atrasar a primeira requisição
+        self._warmer = threading.Thread(target=self._catalogue.warm, name="search-index", daemon=True)
+        self._warmer.start()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def current(self):
+        return self._catalogue
+
+    def refresh(self, force=False):
+        """Recarrega o catálogo se o arquivo mudou; devolve True se trocou o snapshot."""
+        with self._lock:
+            try:
+                if not force and file_version(self.path) == self._catalogue.version:
+                    return False
+                catalogue = load_catalogue(self.path, self.dumps, self.snapshot).warm()
+            except Exception as e:
+                # Um CSV inválido não derruba a API: segue com o snapshot anterior
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("Falha ao recarregar o catálogo %s", self.path)
+                return False
+            self._catalogue = catalogue
+            self.last_error = None
+            logger.info("Catálogo recarregado: versão %s, %d livros", catalogue.version, catalogue.size)
+            return True
+
+    def refresh_async(self, force=False):
+        """Dispara a recarga em segundo plano."""
+        thread = threading.Thread(target=self.refresh, kwargs={"force": force}, daemon=True)
+        thread.start()
+        return thread
+
+    def watch(self, interval):
+        """Verifica o arquivo a cada `interval` segundos em uma thread de fundo (de novo, depois de `stop`)."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop = stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=run, name="catalogue-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self, wait=False):
+        """Encerra a observação do arquivo; com `wait`, espera também a montagem inicial do índice de busca."""
+        self._stop.set()
+        if wait:
+            self._warmer.join()
+            if self._watcher is not None:
+                self._watcher.join()
@@ -0,0 +1,201 @@
+"""Snapshot colunar do catálogo em disco, lido com memory-map.
+
+Cada coluna vira um arquivo próprio dentro de `<snapshot>/<versão>/`:
+
+- colunas numéricas e os códigos de Category: arquivos `.npy` do NumPy;
+- colunas de texto: os valores em UTF-8 concatenados em `<coluna>.txt` e as
+  posições de início de cada valor em `<coluna>.offsets.npy`.
+
+Na carga, os arquivos são abertos com `mmap_mode="r"`, então nada é copiado
+para a memória do processo: as páginas ficam no page cache do sistema e são
+compartilhadas por todos os workers que abrem o mesmo snapshot. Os textos só
+são decodificados quando alguém lê aquela linha.
+
+Os índices derivados (as permutações que ordenam Index e Price, e as colunas
+já ordenadas) também são gravados como `.npy`, para que nenhum worker
+precise recalculá-los nem guardar uma cópia própria.
+
+O arquivo `<snapshot>/CURRENT` aponta para a versão publicada e é trocado
+atomicamente, então um processo lendo o snapshot nunca vê uma versão pela
+metade.
+"""
+import json
+import mmap
+import os
+import shutil
+
+import numpy as np
+
+FORMAT = 2
+CURRENT = "CURRENT"
+KEEP_VERSIONS = 2  # versões mantidas no disco (a publicada e a anterior)
+
+
+class TextColumn:
+    """Coluna de texto decodificada sob demanda a partir do snapshot."""
+
+    def __init__(self, path):
+        self.offsets = np.load(path + ".offsets.npy", mmap_mode="r")
+        nulls = path + ".null.npy"
+        self.nulls = np.load(nulls, mmap_mode="r") if os.path.exists(nulls) else None
+        with open(path + ".txt", "rb") as f:
+            # mmap não aceita arquivo vazio
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        if self.nulls is not None and self.nulls[row]:
+            return None
+        return self._data[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def take(self, rows):
+        """Valores das linhas `rows`, na mesma ordem, como lista."""
+        rows = np.asarray(rows, dtype=np.intp)
+        data = self._data
+        starts = self.offsets[rows].tolist()
+        ends = self.offsets[rows + 1].tolist()
+        values = [data[start:end].decode("utf-8") for start, end in zip(starts, ends)]
+        if self.nulls is not None:
+            values = [None if null else value for value, null in zip(values, self.nulls[rows].tolist())]
+        return values
+
+    def tolist(self):
+        return self.take(np.arange(len(self)))
+
+
+def _write_text(path, values):
+    """Grava os valores em `<path>.txt` e as posições em `<path>.offsets.npy`."""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    nulls = np.zeros(len(values), dtype=bool)
+    position = 0
+    with open(path + ".txt", "wb") as f:
+        for row, value in enumerate(values):
+            if isinstance(value, str):
+                data = value.encode("utf-8")
+                f.write(data)
+                position += len(data)
+            else:
+                nulls[row] = True
+            offsets[row + 1] = position
+    np.save(path + ".offsets.npy", offsets)
+    if nulls.any():
+        np.save(path + ".null.npy", nulls)
+
+
+def write_snapshot(directory, version, columns, categories, indexes):
+    """Grava um snapshot e o publica como versão atual de `directory`.
+
+    `columns` mapeia cada coluna para um array NumPy (numéricas e os códigos
+    de Category) ou para uma sequência de textos; `indexes` mapeia o nome de
+    cada índice derivado para o seu array.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"{version}-{os.getpid()}"
+    target = os.path.join(directory, name)
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(target)
+
+    kinds = {}
+    for field, values in columns.items():
+        path = os.path.join(target, field)
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            np.save(path + ".npy", values)
+            kinds[field] = values.dtype.str
+        else:
+            _write_text(path, values)
+            kinds[field] = "text"
+    _write_text(os.path.join(target, "categories"), list(categories))
+    for index, values in indexes.items():
+        np.save(os.path.join(target, f"index.{index}.npy"), values)
+
+    rows = len(next(iter(columns.values())))
+    meta = {"format": FORMAT, "version": version, "rows": rows, "columns": kinds, "indexes": list(indexes)}
+    with open(os.path.join(target, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    current = os.path.join(directory, CURRENT)
+    with open(current + ".tmp", "w", encoding="utf-8") as f:
+        f.write(name)
+    os.replace(current + ".tmp", current)
+    _prune(directory, name)
+    return target
+
+
+def _prune(directory, current):
+    """Remove as versões antigas (workers que ainda as usam mantêm o mmap aberto)."""
+    versions = [
+        entry for entry in os.scandir(directory)
+        if entry.is_dir() and entry.name != current
+    ]
+    versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _current_path(directory):
+    try:
+        with open(os.path.join(directory, CURRENT), "r", encoding="utf-8") as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def _read_meta(path):
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def snapshot_meta(directory):
+    """Metadados da versão publicada em `directory`, ou None se não houver snapshot."""
+    path = _current_path(directory)
+    if path is None:
+        return None
+    return _read_meta(path)
+
+
+def load_snapshot(directory, version=None):
+    """Abre a versão publicada com memory-map.
+
+    Devolve `(meta, columns, categories, indexes)`; as colunas numéricas e os
+    índices são arrays somente leitura e as colunas de texto são `TextColumn`.
+    CURRENT é lido uma vez só, então os metadados conferidos são sempre os da
+    versão aberta, mesmo que outro processo publique uma nova no meio.
+
+    Com `version`, devolve None se não houver snapshot, se a versão publicada
+    for de outro CSV ou de outro formato, ou se ela for removida durante a
+    carga; quem chama então lê o CSV.
+    """
+    path = _current_path(directory)
+    if path is None:
+        return None
+    try:
+        return _open_version(path, version)
+    except FileNotFoundError:
+        if version is None:
+            raise
+        return None
+
+
+def _open_version(path, version):
+    meta = _read_meta(path)
+    if version is not None and (meta["version"] != version or meta["format"] != FORMAT):
+        return None
+    if meta["format"] != FORMAT:
+        raise ValueError(f"Formato de snapshot não suportado: {meta['format']}")
+    columns = {}
+    for field, kind in meta["columns"].items():
+        if kind == "text":
+            columns[field] = TextColumn(os.path.join(path, field))
+        else:
+            columns[field] = np.load(os.path.join(path, field + ".npy"), mmap_mode="r")
+    categories = TextColumn(os.path.join(path, "categories")).tolist()
+    indexes = {
+        name: np.load(os.path.join(path, f"index.{name}.npy"), mmap_mode="r")
+        for name in meta["indexes"]
+    }
+    return meta, columns, categories, indexes
@@ -4,6 +4,36 @@ SWAGGER = {
     'title':'Catálogo de Livros',
     'uiversion':3}
 
+CATALOGUE_BACKEND = 'memory'  # 'memory' (snapshot em memória) ou 'sqlite' (tabela book do banco)
+CATALOGUE_PATH = 'data/web_scraping.csv'
+CATALOGUE_SNAPSHOT = 'data/web_scraping.snapshot'  # snapshot colunar do CSV, aberto com memory-map (None desliga)
+CATALOGUE_CHECK_INTERVAL = 5  # segundos entre verificações de mudança no CSV (0 desliga)
+STATS_MAX_AGE = 60  # Cache-Control das estatísticas, em segundos
+RESPONSE_CACHE_BYTES = 64 * 1024 * 1024  # memória máxima do cache de respostas prontas (todas as codificações)
+RESPONSE_CACHE_MIN_COMPRESS = 1024  # respostas menores que isso (bytes) não são comprimidas
+HEALTH_UPSTREAM_URL = 'https://books.toscrape.com/'  # site de origem verificado em segundo plano
+HEALTH_CHECK_INTERVAL = 30  # segundos entre verificações do site de origem e do banco
+HEALTH_CHECK_TIMEOUT = 5
+HTTP_POOL_SIZE = 4  # conexões keep-alive por host no cliente HTTP da API
+HTTP_CONNECT_TIMEOUT = 5  # segundos para abrir a conexão nas requisições de saída da API
+HTTP_READ_TIMEOUT = 10  # segundos esperando dados da resposta
+PASSWORD_HASH_METHOD = 'scrypt'
+AUTH_HASH_WORKERS = 2  # threads que calculam hashes de senha
+AUTH_HASH_MAX_PENDING = 2  # logins esperando hash antes de responder 503 (no máximo SERVER_THREADS - 1)
+AUTH_USER_CACHE_SIZE = 1024  # usuários guardados no cache do login
+AUTH_USER_CACHE_TTL = 300  # segundos
+PROFILE_SAMPLE_RATE = 0  # fração das requisições perfiladas com cProfile (0 desliga)
+PROFILE_DIR = 'profiles'  # onde ficam os .prof das requisições perfiladas
+SCRAPE_PRODUCTS = 'data/products.csv'  # URLs dos livros usadas pelos jobs de /api/v1/scraping/trigger
+SCRAPE_BASE_URL = None  # servidor local com páginas salvas para os jobs (None usa o books.toscrape.com)
+SCRAPE_HISTORY = 20  # jobs de scraping guardados para consulta
+ASGI_THREADS = 8  # modo ASGI: threads para as rotas com I/O bloqueante (login, banco, Swagger)
+SERVER_WORKERS = 4  # processos do gunicorn (gunicorn.conf.py)
+SERVER_THREADS = 4  # threads por processo do gunicorn
+DB_POOL_SIZE = 5  # conexões ao banco mantidas por processo
+SQLITE_WAL = True  # journal WAL: leituras de vários processos não esperam as escritas
+SQLITE_BUSY_TIMEOUT = 5000  # ms que uma escrita espera o lock do SQLite antes de falhar
+
 SQLALCHEMY_DATABASE_URI = 'sqlite:///meubanco.db'
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 JWT_SECRET_KEY = 'sua_chave_secreta'
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""Modo de produção da API com vários processos.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Com `preload_app`, o processo mestre importa o app uma vez só: carrega o
+catálogo (colunas do numpy ou o snapshot com memory-map) e monta o índice de
+busca antes do fork. Os workers herdam essas páginas por copy-on-write, então
+a memória de cada worker a mais é só o que ele escreve. `app.before_fork`
+para as threads de fundo e fecha as conexões do mestre; `app.after_fork`
+religa as threads em cada worker.
+
+GUNICORN_BIND escolhe o endereço (padrão 0.0.0.0:8000); SERVER_WORKERS e
+SERVER_THREADS vêm do config.py. Com GUNICORN_PRELOAD=0 cada worker carrega o
+seu próprio catálogo (útil só para comparar).
+"""
+import os
+
+# "config" é o nome de uma opção do gunicorn, então o módulo não pode ficar com esse nome aqui
+from config import SERVER_THREADS, SERVER_WORKERS
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = SERVER_WORKERS
+worker_class = "gthread"
+threads = SERVER_THREADS
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+
+def when_ready(server):
+    # Roda no mestre depois do preload e antes do fork dos workers
+    if server.cfg.preload_app:
+        import app
+
+        app.before_fork()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        import app
+
+        app.after_fork()
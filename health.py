@@ -0,0 +1,138 @@
+"""Verificações de saúde feitas em segundo plano.
+
+Os endpoints de saúde só leem o resultado da última verificação guardado em
+memória; quem faz I/O (o site de origem e o banco) é a thread de
+`HealthMonitor`, em intervalos fixos. Assim um health check do balanceador
+nunca prende um worker esperando a rede, e o site de origem recebe uma
+requisição por intervalo, não uma por health check.
+
+No modo ASGI (`asgi.py`) as mesmas verificações rodam como uma tarefa do
+event loop (`serve_async`), e a do site de origem usa um cliente HTTP
+assíncrono (`async_upstream_check`).
+"""
+import asyncio
+import logging
+import threading
+import time
+
+from scraping.client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+
+def upstream_check(url, timeout=5, client=None):
+    """Verificação que faz um GET em `url` pelo `HttpClient` (com keep-alive entre as rodadas).
+
+    Não há retentativas: a próxima rodada já é a nova tentativa.
+    """
+    if client is None:
+        client = HttpClient(pool_size=1, timeout=timeout)
+
+    def check():
+        response = client.get(url, timeout=timeout, retries=0)
+        response.close()
+        return response.status_code == 200, {"code": response.status_code}
+
+    return check
+
+
+def async_upstream_check(url, timeout=5, client=None):
+    """Como `upstream_check`, mas com um cliente assíncrono (`httpx.AsyncClient`)."""
+
+    async def check():
+        response = await client.get(url, timeout=timeout)
+        return response.status_code == 200, {"code": response.status_code}
+
+    return check
+
+
+class HealthMonitor:
+    """Executa as verificações registradas a cada `interval` segundos.
+
+    Cada verificação é uma função sem argumentos que devolve `(ok, detalhes)`;
+    uma exceção conta como falha. Em `run_once_async` ela também pode ser uma
+    corrotina; as funções comuns rodam em uma thread para não travar o loop.
+    O resultado mais recente de cada uma fica em `results` e é substituído
+    inteiro a cada rodada, então a leitura não precisa de lock.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.checks = {}
+        self.results = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, name, check):
+        self.checks[name] = check
+        return self
+
+    def run_once(self):
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            try:
+                ok, detail = check()
+                error = None
+            except Exception as e:
+                ok, detail, error = False, {}, f"{type(e).__name__}: {e}"
+            self._record(name, started, ok, detail, error)
+
+    async def run_once_async(self):
+        for name, check in list(self.checks.items()):
+            started = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(check):
+                    ok, detail = await check()
+                else:
+                    ok, detail = await asyncio.to_thread(check)
+                error = None
+            except Exception as e:
+                ok, detail, error = False, {}, f"{type(e).__name__}: {e}"
+            self._record(name, started, ok, detail, error)
+
+    def _record(self, name, started, ok, detail, error):
+        result = {
+            "ok": ok,
+            "checked_at": time.time(),
+            "latency": round(time.perf_counter() - started, 4),
+            "error": error,
+            **detail,
+        }
+        if not ok and self.results.get(name, {}).get("ok", True):
+            logger.warning("Verificação %s falhou: %s", name, error or detail)
+        self.results = {**self.results, name: result}
+
+    def result(self, name):
+        """Último resultado da verificação `name`, ou None se ela ainda não rodou."""
+        return self.results.get(name)
+
+    def start(self):
+        """Roda as verificações agora e depois a cada intervalo, em uma thread de fundo.
+
+        Pode ser chamado de novo depois de `stop` (e em um processo filho,
+        onde a thread do pai não existe mais).
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = stop = threading.Event()
+
+        def run():
+            while True:
+                self.run_once()
+                if stop.wait(self.interval):
+                    break
+
+        self._thread = threading.Thread(target=run, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=False):
+        """Encerra a thread de fundo (a rodada em andamento termina antes; com `wait`, espera por ela)."""
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    async def serve_async(self):
+        """Roda as verificações agora e depois a cada intervalo, até a tarefa ser cancelada."""
+        while True:
+            await self.run_once_async()
+            await asyncio.sleep(self.interval)
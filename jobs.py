@@ -0,0 +1,252 @@
+"""Fila de jobs de scraping disparados pela API.
+
+Cada job roda o `scripts/books_scraping.py` em um subprocesso, a partir de
+um pool local de threads, então o crawling (rede, parsing em processos)
+não disputa o interpretador com as requisições da API. O script informa o
+andamento em linhas `PROGRESS {json}`, que o job guarda em `progress`.
+Quando o scraping termina bem, `on_success` publica o novo catálogo (a API
+usa a recarga do `CatalogueStore`, sem reiniciar).
+
+Só existe um scraping ativo por vez: enquanto houver um job na fila ou em
+execução, novos pedidos recebem esse mesmo job. Com `state_path`, os jobs
+ficam em um arquivo JSON compartilhado por todos os processos da API (os
+workers do gunicorn), então qualquer worker consulta qualquer job e um
+disparo em outro worker recebe o job ativo. O processo que roda o job
+segura um lock de arquivo (`flock`) até gravar o estado final; um job ativo
+cujo lock está livre ficou para trás quando o seu processo morreu.
+"""
+import fcntl
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PENDING = "na fila"
+RUNNING = "executando"
+DONE = "concluído"
+FAILED = "falhou"
+LOG_LINES = 20
+ORPHANED = "o processo da API que rodava o job foi encerrado"
+
+
+class ScrapeBusy(Exception):
+    """Outro processo já está rodando um scraping sobre os mesmos arquivos."""
+
+
+class ScrapeJob:
+    def __init__(self, options, requested_by=None):
+        self.id = uuid.uuid4().hex
+        self.options = options
+        self.requested_by = requested_by
+        self.state = PENDING
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {"done": 0, "total": None, "pages": 0, "pages_per_sec": 0.0, "errors": 0}
+        self.error = None
+        self.catalogue_version = None
+        self.log = deque(maxlen=LOG_LINES)
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data["options"], data["requested_by"])
+        job.id = data["id"]
+        job.state = data["status"]
+        job.created_at = data["created_at"]
+        job.started_at = data["started_at"]
+        job.finished_at = data["finished_at"]
+        job.progress = data["progress"]
+        job.error = data["error"]
+        job.catalogue_version = data["catalogue_version"]
+        return job
+
+    @property
+    def active(self):
+        return self.state in (PENDING, RUNNING)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.state,
+            "options": self.options,
+            "requested_by": self.requested_by,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": dict(self.progress),
+            "error": self.error,
+            "catalogue_version": self.catalogue_version,
+        }
+
+
+class ScrapeQueue:
+    """Executa jobs de scraping em um pool local, um scraping ativo por vez.
+
+    `command(options)` devolve a linha de comando do scraping e
+    `on_success(job)` é chamado depois que ele termina com sucesso (uma
+    exceção ali marca o job como falho). Guarda os `history` jobs mais
+    recentes para consulta: no arquivo `state_path`, se informado, ou na
+    memória do processo.
+    """
+
+    def __init__(self, command, on_success=None, lock_path=None, state_path=None, workers=1, history=20):
+        self.command = command
+        self.on_success = on_success
+        self.lock_path = lock_path
+        self.state_path = state_path
+        self.history = history
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="scrape-job")
+
+    def submit(self, options, requested_by=None):
+        """Enfileira um scraping; devolve `(job, criado)`, com criado False se já havia um ativo."""
+        with self._lock, self._state() as jobs:
+            active = next((job for job in jobs.values() if job.active), None)
+            if active is not None:
+                lock = self._try_file_lock()
+                if lock is None:
+                    return active, False
+                self._orphan(active)
+            else:
+                lock = self._acquire_file_lock()
+            job = ScrapeJob(options, requested_by)
+            jobs[job.id] = job
+        self._executor.submit(self._run, job, lock)
+        return job, True
+
+    def get(self, job_id):
+        job = self._read().get(job_id) if self.state_path is not None else self.jobs.get(job_id)
+        if job is not None and job.active and self.state_path is not None:
+            lock = self._try_file_lock()
+            if lock is not None:
+                lock.close()
+                self._orphan(job)
+        return job
+
+    def _orphan(self, job):
+        job.state = FAILED
+        job.error = ORPHANED
+        job.finished_at = job.finished_at or time.time()
+
+    @contextmanager
+    def _state(self):
+        """Jobs guardados, para alterar; com `state_path`, relidos do arquivo e regravados ao sair."""
+        if self.state_path is None:
+            yield self.jobs
+            self._trim(self.jobs)
+            return
+        with open(self.state_path + ".lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            jobs = self._read()
+            yield jobs
+            self._trim(jobs)
+            tmp = self.state_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump([job.to_dict() for job in jobs.values()], f)
+            os.replace(tmp, self.state_path)
+
+    def _read(self):
+        """Jobs do arquivo `state_path` (substituído atomicamente, então dá para ler sem lock)."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return OrderedDict((data["id"], ScrapeJob.from_dict(data)) for data in json.load(f))
+        except FileNotFoundError:
+            return OrderedDict()
+
+    def _trim(self, jobs):
+        while len(jobs) > self.history:
+            jobs.popitem(last=False)
+
+    def _save(self, job):
+        """Grava o estado atual de `job` onde os outros processos o leem."""
+        with self._state() as jobs:
+            if job.id in jobs:
+                jobs[job.id] = job
+
+    def _try_file_lock(self):
+        """Lock de scraping, ou None se outro job (deste ou de outro processo) o segura."""
+        if self.lock_path is None:
+            return None
+        try:
+            return self._acquire_file_lock()
+        except ScrapeBusy:
+            return None
+
+    def _acquire_file_lock(self):
+        if self.lock_path is None:
+            return None
+        handle = open(self.lock_path, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            raise ScrapeBusy()
+        return handle
+
+    def _run(self, job, lock):
+        job.state = RUNNING
+        job.started_at = time.time()
+        try:
+            self._save(job)
+            self._scrape(job)
+            if self.on_success is not None:
+                self.on_success(job)
+            job.state = DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.state = FAILED
+            logger.warning("Job de scraping %s falhou: %s", job.id, job.error)
+        finally:
+            job.finished_at = time.time()
+            try:
+                self._save(job)
+            finally:
+                # Só depois do estado final gravado: lock livre com job ativo indica um processo morto
+                if lock is not None:
+                    lock.close()
+
+    def _scrape(self, job):
+        process = subprocess.Popen(
+            self.command(job.options),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            env={**os.environ, "PYTHONUNBUFFERED": "1"},
+        )
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            if line.startswith("PROGRESS "):
+                job.progress = json.loads(line[len("PROGRESS "):])
+                self._save(job)
+            else:
+                job.log.append(line)
+        if process.wait() != 0:
+            raise RuntimeError(f"scraping terminou com código {process.returncode}: {' | '.join(list(job.log)[-3:])}")
+
+
+def books_scraping_command(script, products, output, base_url=None, extra=()):
+    """Linha de comando do `books_scraping.py` usada pelos jobs da API."""
+
+    def command(options):
+        args = [sys.executable, script, "--progress", "--products", products, "--output", output, *extra]
+        if base_url:
+            args += ["--base-url", base_url]
+        if options.get("incremental"):
+            args.append("--incremental")
+        if options.get("restart"):
+            args.append("--restart")
+        return args
+
+    return command
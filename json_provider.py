@@ -0,0 +1,74 @@
+"""Provider de JSON da API.
+
+`FastJSONProvider` troca o `json` da biblioteca padrão pelo orjson quando
+ele está instalado (o mesmo `jsonify`, `app.json.dumps` etc.), com suporte
+direto a escalares e arrays do numpy. Sem o orjson, tudo continua igual ao
+provider padrão do Flask.
+
+`records` codifica uma lista de livros a partir das colunas já convertidas em
+listas de valores Python (`column_values` do catálogo), sem passar por um
+DataFrame por linha, e entrega os bytes direto para a resposta.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def _options(self, indent=None, sort_keys=None):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        # O orjson sempre gera JSON compacto em UTF-8: separators e ensure_ascii não se aplicam
+        option = self._options(kwargs.get("indent"), kwargs.get("sort_keys"))
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def records(self, columns, values):
+        """Lista JSON (bytes) de objetos com as chaves `columns`.
+
+        `values[i]` tem os valores da coluna `columns[i]` em todas as linhas.
+        """
+        rows = _rows(columns, values)
+        if orjson is None:
+            return self.dumps(rows, separators=(",", ":")).encode()
+        return orjson.dumps(rows, default=self.default, option=self._options())
+
+    def ndjson(self, columns, values):
+        """As mesmas linhas de `records`, uma por linha (ndjson)."""
+        if orjson is None:
+            return "".join(self.dumps(row, separators=(",", ":")) + "\n" for row in _rows(columns, values)).encode()
+        option = self._options() | orjson.OPT_APPEND_NEWLINE
+        return b"".join(orjson.dumps(row, default=self.default, option=option) for row in _rows(columns, values))
+
+    def records_response(self, columns, values):
+        """Como `response`, para a lista de `records`."""
+        return self._app.response_class(self.records(columns, values) + b"\n", mimetype=self.mimetype)
+
+
+def _rows(columns, values):
+    if not columns:
+        return []
+    return [dict(zip(columns, row)) for row in zip(*values)]
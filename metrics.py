@@ -0,0 +1,182 @@
+"""Métricas das requisições no formato texto do Prometheus.
+
+`Metrics(app)` registra, por rota, a contagem de requisições (por método e
+status), o histograma de latência e o de tamanho das respostas. Dentro de
+uma requisição, `phase("nome")` mede uma etapa interna (filtro,
+serialização, autenticação...) e o tempo entra em um histograma por rota e
+etapa; as consultas ao banco são medidas como a etapa "db" por eventos do
+SQLAlchemy (`instrument_engine`).
+
+As métricas ficam na memória de cada processo e são expostas em `/metrics`,
+junto com as linhas de outras fontes registradas com `add_collector` (os
+contadores do cliente HTTP de saída, por exemplo).
+
+Com `PROFILE_SAMPLE_RATE` maior que zero, essa fração das requisições roda
+sob o cProfile e o resultado é gravado em `PROFILE_DIR`, um arquivo `.prof`
+por requisição (abra com `python -m pstats` ou snakeviz).
+"""
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+def _labels(**labels):
+    escaped = {key: str(value).replace("\\", "\\\\").replace('"', '\\"') for key, value in labels.items()}
+    return ",".join(f'{key}="{value}"' for key, value in escaped.items())
+
+
+@contextmanager
+def phase(name):
+    """Mede uma etapa da requisição atual (fora de uma requisição não faz nada)."""
+    if not has_request_context():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add_phase(name, time.perf_counter() - started)
+
+
+def _add_phase(name, elapsed):
+    phases = g.setdefault("metrics_phases", defaultdict(float))
+    phases[name] += elapsed
+
+
+def instrument_engine(engine):
+    """Mede cada consulta do `engine` como a etapa "db" da requisição."""
+
+    # O início fica no contexto da execução: uma consulta que falha (sem after_cursor_execute) não deixa resto
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is not None and has_request_context():
+            _add_phase("db", time.perf_counter() - started)
+
+
+class Metrics:
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.sizes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.phases = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.collectors = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.profile_rate = app.config.get("PROFILE_SAMPLE_RATE", 0)
+        self.profile_dir = app.config.get("PROFILE_DIR", "profiles")
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.add_url_rule("/metrics", "metrics", self.view)
+
+    def add_collector(self, collector):
+        """Registra uma função que devolve linhas extras (já no formato do Prometheus) para o /metrics."""
+        self.collectors.append(collector)
+
+    def _before(self):
+        g.metrics_started = time.perf_counter()
+        if self.profile_rate and random.random() < self.profile_rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return                                            # Já há outro profiler ativo
+            g.metrics_profiler = profiler
+
+    def _after(self, response):
+        elapsed = time.perf_counter() - g.pop("metrics_started", time.perf_counter())
+        route = request.url_rule.rule if request.url_rule else "<sem rota>"
+        profiler = g.pop("metrics_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            self._dump(profiler, route)
+        # Respostas em streaming não têm tamanho conhecido aqui
+        size = None if response.is_streamed else response.calculate_content_length()
+        with self._lock:
+            self.requests[(request.method, route, response.status_code)] += 1
+            self.latency[route].observe(elapsed)
+            if size is not None:
+                self.sizes[route].observe(size)
+            for name, value in g.get("metrics_phases", {}).items():
+                self.phases[(route, name)].observe(value)
+        return response
+
+    def _dump(self, profiler, route):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = re.sub(r"\W+", "_", route).strip("_") or "root"
+        path = os.path.join(self.profile_dir, f"{name}-{time.time_ns()}-{os.getpid()}.prof")
+        profiler.dump_stats(path)
+
+    def render(self):
+        """Métricas no formato texto do Prometheus."""
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requisições atendidas por rota, método e status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}")
+            lines += [
+                "# HELP http_request_duration_seconds Latência das requisições por rota.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for route, histogram in sorted(self.latency.items()):
+                lines.extend(histogram.lines("http_request_duration_seconds", _labels(route=route)))
+            lines += [
+                "# HELP http_response_size_bytes Tamanho do corpo das respostas por rota.",
+                "# TYPE http_response_size_bytes histogram",
+            ]
+            for route, histogram in sorted(self.sizes.items()):
+                lines.extend(histogram.lines("http_response_size_bytes", _labels(route=route)))
+            lines += [
+                "# HELP app_phase_duration_seconds Tempo das etapas internas de cada requisição.",
+                "# TYPE app_phase_duration_seconds histogram",
+            ]
+            for (route, name), histogram in sorted(self.phases.items()):
+                lines.extend(histogram.lines("app_phase_duration_seconds", _labels(route=route, phase=name)))
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    def view(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,196 @@
+"""Cache de respostas já serializadas e comprimidas, por versão do catálogo.
+
+As listagens completas (títulos, top-rated, categorias, estatísticas) só
+mudam quando o catálogo muda. `ResponseCache` guarda, para cada rota e query
+string, os bytes do JSON já codificado e as versões comprimidas com gzip e,
+se o pacote `brotli` estiver instalado, com brotli (geradas quando a mesma
+resposta é pedida de novo). Uma requisição repetida vira uma consulta ao
+dicionário e a escrita dos bytes prontos.
+
+A versão do catálogo é o ETag das respostas (com sufixo por codificação nas
+comprimidas), então clientes com `If-None-Match` recebem 304. As entradas são
+descartadas por LRU quando o total de bytes passa de `max_bytes`, e todas as
+de uma versão antiga saem quando o catálogo muda.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+# Recalculados a cada resposta servida do cache
+COMPUTED_HEADERS = {"Content-Type", "Content-Length", "ETag", "Vary", "Cache-Control"}
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def etag(version, encoding):
+    return version if encoding == "identity" else f"{version}-{encoding}"
+
+
+def not_modified(request, version):
+    """True se o `If-None-Match` da requisição já tem alguma codificação da versão atual."""
+    return any(
+        request.if_none_match.contains_weak(etag(version, encoding)) for encoding in ("identity",) + ENCODINGS
+    )
+
+
+def validators(response, version, encoding="identity", max_age=None):
+    """ETag, Vary e Cache-Control comuns às respostas do cache (inclusive as 304)."""
+    response.set_etag(etag(version, encoding))
+    response.vary.add("Accept-Encoding")
+    if max_age is not None:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    return response
+
+
+class CachedResponse:
+    def __init__(self, key, version, status, headers, mimetype, body):
+        self.key = key
+        self.version = version
+        self.status = status
+        self.headers = headers
+        self.mimetype = mimetype
+        # Codificação -> bytes; None quando comprimir não reduz o tamanho
+        self.bodies = {"identity": body}
+        self.size = len(body)
+        self.hits = 0
+
+    def respond(self, request, encoding, max_age=None):
+        """Resposta para `request` nos bytes de `encoding`, ou 304 se o cliente já tem a versão."""
+        if not_modified(request, self.version):
+            response = Response(status=304)
+        else:
+            response = Response(self.bodies[encoding], status=self.status, headers=self.headers, mimetype=self.mimetype)
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+        return validators(response, self.version, encoding, max_age)
+
+
+class ResponseCache:
+    """LRU de `CachedResponse` limitado a `max_bytes` (somando todas as codificações)."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, min_compress=1024):
+        self.max_bytes = max_bytes
+        self.min_compress = min_compress
+        self.version = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def get(self, version, key):
+        with self._lock:
+            if version != self.version:
+                # Catálogo novo: as respostas da versão anterior não servem mais
+                self._entries.clear()
+                self._building.clear()
+                self.size = 0
+                self.version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                self.hits += 1
+            return entry
+
+    def ready(self, version, key, request):
+        """True se `key` já está pronta na versão `version`, na codificação aceita por `request`.
+
+        Nesse caso responder não monta nem comprime nada: são só os bytes do cache.
+        """
+        encoding = request.accept_encodings.best_match(ENCODINGS + ("identity",), "identity")
+        with self._lock:
+            entry = self._entries.get(key) if version == self.version else None
+            if entry is None:
+                return False
+            return encoding in entry.bodies or len(entry.bodies["identity"]) < self.min_compress
+
+    def get_or_build(self, version, key, build):
+        """Entrada de `key` na versão `version`, montada com `build()` se faltar.
+
+        `build` devolve uma resposta do Flask; só respostas 200 sem streaming
+        são guardadas (as demais são devolvidas como vieram, no lugar da entrada).
+        Requisições simultâneas da mesma chave esperam uma única montagem.
+        """
+        entry = self.get(version, key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            entry = self.get(version, key)
+            if entry is not None:
+                return entry
+            try:
+                response = build()
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                headers = [(name, value) for name, value in response.headers if name not in COMPUTED_HEADERS]
+                entry = CachedResponse(key, version, response.status_code, headers, response.mimetype, response.get_data())
+                self._put(version, key, entry)
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return entry
+
+    def _put(self, version, key, entry):
+        with self._lock:
+            self.misses += 1
+            if version != self.version or entry.size > self.max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[key] = entry
+            self.size += entry.size
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def respond(self, entry, request, max_age=None):
+        """Resposta de `entry` na melhor codificação aceita pelo cliente.
+
+        A versão comprimida é gerada na primeira vez que a entrada é pedida de
+        novo, então respostas pedidas uma única vez (uma página com offset
+        qualquer) não pagam a compressão.
+        """
+        encoding = request.accept_encodings.best_match(ENCODINGS + ("identity",), "identity")
+        if encoding != "identity" and encoding not in entry.bodies:
+            body = entry.bodies["identity"]
+            if entry.hits and len(body) >= self.min_compress:
+                self._compress(entry, encoding)
+        if entry.bodies.get(encoding) is None:
+            encoding = "identity"
+        return entry.respond(request, encoding, max_age)
+
+    def _compress(self, entry, encoding):
+        body = entry.bodies["identity"]
+        compressed = compress(body, encoding)
+        if len(compressed) >= len(body):
+            compressed = None
+        with self._lock:
+            if encoding in entry.bodies:
+                return
+            entry.bodies[encoding] = compressed
+            added = len(compressed) if compressed is not None else 0
+            entry.size += added
+            if self._entries.get(entry.key) is entry:
+                self.size += added
+                self._evict()
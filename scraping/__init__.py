@@ -0,0 +1,38 @@
+from .cache import PageCache, content_hash
+from .client import USER_AGENT, HttpClient, HttpStats
+from .crawler import Crawler, CrawlStats, FetchResult, HostRateLimiter
+from .parser import BACKENDS, DEFAULT_BACKEND, ParserPool, parse_product
+from .writers import (
+    BOOK_COLUMNS, BOOK_SCHEMA, BUMP_BOOK_VERSION, DROP_BOOK_TABLES, FIELDNAMES, META_SCHEMA, OUTDATED_BOOK_TABLE,
+    REBUILD_BOOK_FTS, WRITERS, Checkpoint, CsvWriter, DatabaseWriter, JsonLinesWriter, PreviousRows,
+)
+
+__all__ = [
+    "BACKENDS",
+    "BOOK_COLUMNS",
+    "BOOK_SCHEMA",
+    "BUMP_BOOK_VERSION",
+    "Checkpoint",
+    "Crawler",
+    "CrawlStats",
+    "CsvWriter",
+    "DEFAULT_BACKEND",
+    "DROP_BOOK_TABLES",
+    "DatabaseWriter",
+    "FIELDNAMES",
+    "FetchResult",
+    "HostRateLimiter",
+    "HttpClient",
+    "HttpStats",
+    "JsonLinesWriter",
+    "META_SCHEMA",
+    "OUTDATED_BOOK_TABLE",
+    "PageCache",
+    "ParserPool",
+    "PreviousRows",
+    "REBUILD_BOOK_FTS",
+    "USER_AGENT",
+    "WRITERS",
+    "content_hash",
+    "parse_product",
+]
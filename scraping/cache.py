@@ -0,0 +1,58 @@
+"""Cache em disco das páginas já baixadas.
+
+Para cada URL guarda os validadores HTTP (ETag e Last-Modified) e o hash do
+conteúdo. Com eles o crawler envia requisições condicionais e o scraping
+incremental sabe quais páginas não mudaram desde a última execução.
+"""
+import hashlib
+import json
+import os
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def __contains__(self, url):
+        return url in self.entries
+
+    def conditional_headers(self, url):
+        entry = self.entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url, result):
+        """Registra a resposta e informa se o conteúdo mudou desde a última vez."""
+        digest = content_hash(result.text)
+        previous = self.entries.get(url)
+        self.entries[url] = {
+            "etag": result.headers.get("ETag"),
+            "last_modified": result.headers.get("Last-Modified"),
+            "hash": digest,
+        }
+        return previous is None or previous.get("hash") != digest
+
+    def retain(self, urls):
+        """Descarta as entradas que não estão em `urls`."""
+        urls = set(urls)
+        self.entries = {url: entry for url, entry in self.entries.items() if url in urls}
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
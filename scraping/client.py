@@ -0,0 +1,172 @@
+"""Cliente HTTP compartilhado por todo o tráfego de saída do projeto.
+
+`HttpClient` é uma sessão do requests com keep-alive e um pool limitado de
+conexões por host, usada pelos scripts de scraping (via `Crawler`) e pela
+API (verificação do site de origem). Toda requisição sai com o mesmo
+User-Agent e com timeout de conexão e de leitura; falhas de rede e os
+status de `RETRY_STATUS` são repetidos com backoff exponencial com jitter,
+para que muitas threads não voltem todas ao mesmo tempo.
+
+`HttpStats` conta requisições, conexões abertas e reaproveitadas e bytes
+recebidos, então o custo dos handshakes (TCP e TLS) aparece nos resumos do
+scraping e no /metrics da API.
+"""
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+USER_AGENT = "FIAP-Tech-Challenge-Books/1.0 (+https://github.com/brunnosalvatti/FIAP_Tech_Challenge_01)"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HttpStats:
+    """Contadores do cliente, atualizados pelas threads que o usam."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def connections_reused(self):
+        """Requisições que saíram por uma conexão já aberta (sem novo handshake)."""
+        return max(self.requests - self.connections_opened, 0)
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "bytes_received": self.bytes_received,
+            "retries": self.retries,
+            "errors": self.errors,
+        }
+
+    def summary(self):
+        return (
+            f"{self.requests} requisições HTTP, {self.connections_opened} conexões abertas, "
+            f"{self.connections_reused} reaproveitadas, {self.bytes_received / 1024:.0f} KiB recebidos"
+        )
+
+    def lines(self, name):
+        """Contadores no formato texto do Prometheus, com o cliente `name` como label."""
+        for key, value in self.to_dict().items():
+            metric = f"http_client_{key}_total"
+            yield f"# TYPE {metric} counter"
+            yield f'{metric}{{client="{name}"}} {value}'
+
+
+def _counting_pools(stats):
+    """Classes de pool do urllib3 que contam em `stats` cada conexão aberta (inclusive tentativas que falham)."""
+
+    class CountingHTTPConnection(HTTPConnection):
+        def connect(self):
+            stats.add(connections_opened=1)
+            super().connect()
+
+    class CountingHTTPSConnection(HTTPSConnection):
+        def connect(self):
+            stats.add(connections_opened=1)
+            super().connect()
+
+    class CountingHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = CountingHTTPConnection
+
+    class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = CountingHTTPSConnection
+
+    return {"http": CountingHTTPConnectionPool, "https": CountingHTTPSConnectionPool}
+
+
+class _CountingAdapter(HTTPAdapter):
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _counting_pools(self.stats)
+
+
+class HttpClient:
+    """Sessão HTTP com pool de conexões, timeouts, retentativas e contadores.
+
+    `pool_size` é o número de conexões mantidas por host (com `block`, as
+    threads esperam uma conexão livre em vez de abrir conexões extras que
+    seriam descartadas). `timeout` é o padrão de cada requisição, em segundos
+    ou como `(conexão, leitura)`. `limiter`, se informado, é chamado com
+    `wait(url)` antes de cada tentativa.
+    """
+
+    def __init__(self, pool_size=10, timeout=(5, 10), retries=0, backoff=0.5, block=True,
+                 user_agent=USER_AGENT, limiter=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = limiter
+        self.stats = HttpStats()
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = _CountingAdapter(self.stats, pool_connections=pool_size, pool_maxsize=pool_size, pool_block=block)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def delay(self, attempt):
+        """Espera antes da retentativa `attempt` (0 é a primeira): backoff exponencial com jitter."""
+        return random.uniform(0, self.backoff * 2**attempt)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def request(self, method, url, retries=None, timeout=None, **kwargs):
+        """Faz a requisição, repetindo falhas de rede e status de `RETRY_STATUS`.
+
+        Devolve a última resposta (que pode ter um status de `RETRY_STATUS` se
+        as tentativas acabarem), com o número de tentativas em `attempts`.
+        Se a última tentativa falhar na rede, a exceção do requests é relançada
+        com o mesmo atributo `attempts`.
+        """
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            if attempt:
+                self.stats.add(retries=1)
+                time.sleep(self.delay(attempt - 1))
+            if self.limiter is not None:
+                self.limiter.wait(url)
+            self.stats.add(requests=1)
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except requests.RequestException as e:
+                self.stats.add(errors=1)
+                if attempt == retries:
+                    e.attempts = attempt + 1
+                    raise
+                continue
+            # Bytes lidos do socket, antes de descomprimir (com stream=True o corpo ainda não foi lido)
+            self.stats.add(bytes_received=response.raw.tell())
+            response.attempts = attempt + 1
+            if response.status_code not in RETRY_STATUS or attempt == retries:
+                return response
+            response.close()
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,168 @@
+"""Motor de crawling concorrente usado pelos scripts de scraping.
+
+As URLs são buscadas por um pool limitado de threads que compartilham um
+`HttpClient` (keep-alive, pool de conexões do tamanho da concorrência).
+Cada host tem um limite de requisições por segundo, falhas transitórias são
+repetidas com backoff exponencial com jitter e cada URL é requisitada uma
+única vez por execução.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import requests
+
+from .client import RETRY_STATUS, HttpClient
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int | None = None
+    text: str = ""
+    headers: dict = field(default_factory=dict)
+    error: str | None = None
+    attempts: int = 0
+
+    @property
+    def ok(self):
+        return self.status == 200
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+
+class HostRateLimiter:
+    """Espaça as requisições de cada host para no máximo `rate` por segundo."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class CrawlStats:
+    """Contadores da execução, atualizados pelas threads do pool."""
+
+    def __init__(self):
+        self.pages = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, result):
+        with self._lock:
+            if result.ok:
+                self.pages += 1
+                self.bytes += len(result.text)
+            elif result.not_modified:
+                self.not_modified += 1
+            else:
+                self.errors += 1
+            self.retries += max(result.attempts - 1, 0)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def pages_per_sec(self):
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"{self.pages} páginas em {self.elapsed:.2f}s "
+            f"({self.pages_per_sec:.1f} páginas/s, {self.not_modified} não modificadas, {self.errors} erros, "
+            f"{self.retries} retentativas, {self.bytes / 1024:.0f} KiB)"
+        )
+
+
+class Crawler:
+    """Pool de requisições com concorrência limitada.
+
+    `fetch_all` devolve os resultados na mesma ordem das URLs de entrada e
+    mantém no máximo `window` requisições em voo, então a memória não cresce
+    com o tamanho do catálogo.
+    """
+
+    def __init__(
+        self,
+        concurrency=16,
+        rate_per_host=None,
+        retries=3,
+        backoff=0.5,
+        timeout=10,
+        client=None,
+        cache=None,
+    ):
+        self.concurrency = concurrency
+        self.cache = cache
+        self.window = concurrency * 4
+        self.limiter = HostRateLimiter(rate_per_host)
+        self.stats = CrawlStats()
+        self.client = client or HttpClient(
+            pool_size=concurrency, timeout=timeout, retries=retries, backoff=backoff, limiter=self.limiter
+        )
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def fetch(self, url):
+        result = FetchResult(url)
+        # Com cache, a requisição é condicional e páginas iguais voltam como 304 sem corpo
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+        try:
+            r = self.client.get(url, headers=headers)
+        except requests.RequestException as e:
+            result.error = str(e)
+            result.attempts = e.attempts
+        else:
+            result.status = r.status_code
+            result.headers = dict(r.headers)
+            result.attempts = r.attempts
+            if r.status_code not in RETRY_STATUS:
+                # O site não declara charset, mas o conteúdo é UTF-8
+                if "charset" not in r.headers.get("Content-Type", ""):
+                    r.encoding = "utf-8"
+                result.text = r.text
+        self.stats.record(result)
+        return result
+
+    def fetch_all(self, urls):
+        seen = set()
+        pending = deque()
+        for url in urls:
+            if url in seen:
+                continue
+            seen.add(url)
+            pending.append(self._executor.submit(self.fetch, url))
+            if len(pending) >= self.window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,203 @@
+"""Extração dos campos das páginas de produto.
+
+O parsing usa o backend compilado mais rápido disponível (selectolax, depois
+lxml) e cai para o html.parser do BeautifulSoup quando nenhum está instalado.
+Os seletores de cada backend são compilados uma única vez no carregamento do
+módulo. `ParserPool` distribui o parsing entre processos para que ele escale
+com o número de núcleos em vez de disputar a mesma CPU com a rede.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+SITE_URL = "https://books.toscrape.com/"
+RATINGS = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+BACKENDS = [
+    name
+    for name, available in (
+        ("selectolax", LexborHTMLParser is not None),
+        ("lxml", lxml_html is not None),
+        ("html.parser", True),
+    )
+    if available
+]
+DEFAULT_BACKEND = BACKENDS[0]
+
+# Seletores CSS compartilhados por selectolax e BeautifulSoup
+CSS = {
+    "breadcrumb": "ul.breadcrumb li",
+    "price": "p.price_color",
+    "table": "table.table-striped td",
+    "availability": "p.instock.availability",
+    "image": "#product_gallery img",
+    "description": "#product_description ~ p",
+    "rating": "p.star-rating",
+}
+SOUPSIEVE = {name: soupsieve.compile(selector) for name, selector in CSS.items()}
+
+if lxml_html is not None:
+    def _class(name):
+        return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+    XPATH = {
+        "breadcrumb": etree.XPath(f"//ul[{_class('breadcrumb')}]/li"),
+        "price": etree.XPath(f"(//p[{_class('price_color')}])[1]"),
+        "table": etree.XPath(f"//table[{_class('table-striped')}]//td"),
+        "availability": etree.XPath(f"(//p[{_class('instock')} and {_class('availability')}])[1]"),
+        "image": etree.XPath("(//*[@id='product_gallery']//img)[1]/@src"),
+        "description": etree.XPath("//*[@id='product_description']/following-sibling::p[1]"),
+        "rating": etree.XPath(f"(//p[{_class('star-rating')}])[1]/@class"),
+    }
+
+
+def _fields(breadcrumb, price, table, availability, image, description, rating_class):
+    """Normaliza os textos extraídos por qualquer backend."""
+    rating = rating_class.split()[1] if rating_class and len(rating_class.split()) > 1 else None
+    stock = table[5] if len(table) > 5 else ""
+    return {
+        "title": breadcrumb[3],
+        "category": breadcrumb[2],
+        "price": price.lstrip("Â£"),
+        "stock": int("".join(c for c in stock if c.isdigit()) or 0),
+        "availability": availability,
+        "image": SITE_URL + image.replace("../", "") if image else None,
+        "rating": RATINGS.get(rating, 0),
+        "description": description,
+    }
+
+
+def _parse_selectolax(html):
+    tree = LexborHTMLParser(html)
+
+    def text(node):
+        return node.text().strip() if node is not None else None
+
+    image = tree.css_first(CSS["image"])
+    rating = tree.css_first(CSS["rating"])
+    return _fields(
+        [text(li) for li in tree.css(CSS["breadcrumb"])],
+        text(tree.css_first(CSS["price"])),
+        [text(td) for td in tree.css(CSS["table"])],
+        text(tree.css_first(CSS["availability"])),
+        image.attributes.get("src") if image is not None else None,
+        text(tree.css_first(CSS["description"])),
+        rating.attributes.get("class") if rating is not None else None,
+    )
+
+
+def _parse_lxml(html):
+    tree = lxml_html.fromstring(html)
+
+    def first_text(nodes):
+        return nodes[0].text_content().strip() if nodes else None
+
+    image = XPATH["image"](tree)
+    rating = XPATH["rating"](tree)
+    return _fields(
+        [li.text_content().strip() for li in XPATH["breadcrumb"](tree)],
+        first_text(XPATH["price"](tree)),
+        [td.text_content().strip() for td in XPATH["table"](tree)],
+        first_text(XPATH["availability"](tree)),
+        image[0] if image else None,
+        first_text(XPATH["description"](tree)),
+        rating[0] if rating else None,
+    )
+
+
+def _parse_soup(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    def text(node):
+        return node.text.strip() if node is not None else None
+
+    image = SOUPSIEVE["image"].select_one(soup)
+    rating = SOUPSIEVE["rating"].select_one(soup)
+    return _fields(
+        [text(li) for li in SOUPSIEVE["breadcrumb"].select(soup)],
+        text(SOUPSIEVE["price"].select_one(soup)),
+        [text(td) for td in SOUPSIEVE["table"].select(soup)],
+        text(SOUPSIEVE["availability"].select_one(soup)),
+        image.get("src") if image is not None else None,
+        text(SOUPSIEVE["description"].select_one(soup)),
+        " ".join(rating["class"]) if rating is not None else None,
+    )
+
+
+PARSERS = {
+    "selectolax": _parse_selectolax,
+    "lxml": _parse_lxml,
+    "html.parser": _parse_soup,
+}
+
+
+def parse_product(html, backend=None):
+    """Campos de uma página de produto do books.toscrape.com."""
+    return PARSERS[backend or DEFAULT_BACKEND](html)
+
+
+def _parse_job(html, backend):
+    try:
+        return parse_product(html, backend), None
+    except (IndexError, AttributeError, TypeError, ValueError) as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+class ParserPool:
+    """Pool de processos que faz o parsing das páginas baixadas.
+
+    `parse_all` recebe pares `(chave, html)` e devolve `(chave, campos, erro)`
+    na mesma ordem. Itens com `html=None` atravessam o pool sem parsing. Com
+    `workers <= 1` o parsing roda no próprio processo.
+    """
+
+    def __init__(self, workers=None, backend=None):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.backend = backend or DEFAULT_BACKEND
+        self.window = max(self.workers, 1) * 8
+        self._executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+
+    def parse_all(self, items):
+        pending = deque()
+        for key, html in items:
+            if html is None:
+                pending.append((key, None))
+            elif self._executor is None:
+                pending.append((key, _parse_job(html, self.backend)))
+            else:
+                pending.append((key, self._executor.submit(_parse_job, html, self.backend)))
+            if len(pending) >= self.window:
+                yield self._result(*pending.popleft())
+        while pending:
+            yield self._result(*pending.popleft())
+
+    @staticmethod
+    def _result(key, job):
+        if job is None:
+            return key, None, None
+        fields, error = job if isinstance(job, tuple) else job.result()
+        return key, fields, error
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,338 @@
+"""Saída em streaming do scraping.
+
+Cada linha é gravada assim que o parsing termina, então a memória fica
+constante independentemente do tamanho do catálogo. Os destinos em arquivo
+escrevem em `<saída>.partial` e só substituem a saída final quando o scraping
+termina; junto dele fica um `<saída>.checkpoint` com a posição da última URL
+concluída, usado para retomar uma execução interrompida.
+"""
+import csv
+import json
+import os
+import sqlite3
+
+FIELDNAMES = ['Title', 'Category', 'Price', 'Stock', 'Image', 'Rating', 'Link', 'Description', 'Index']
+
+# Colunas da tabela `book` no banco da API
+BOOK_COLUMNS = {
+    'Index': 'id',
+    'Title': 'title',
+    'Category': 'category',
+    'Price': 'price',
+    'Stock': 'stock',
+    'Image': 'image',
+    'Rating': 'rating',
+    'Link': 'link',
+    'Description': 'description',
+}
+# Mesmo esquema do modelo Book da API: índices em category, price, rating e
+# position (a ordem das linhas no CSV, que é a ordem padrão das listagens)
+# e uma tabela FTS5 (conteúdo externo) para a busca textual.
+BOOK_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS book (
+        id INTEGER NOT NULL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        category VARCHAR(80) NOT NULL,
+        price FLOAT NOT NULL,
+        stock INTEGER NOT NULL,
+        image VARCHAR(255),
+        rating INTEGER NOT NULL,
+        link VARCHAR(255),
+        description TEXT,
+        position INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_book_category ON book (category)",
+    "CREATE INDEX IF NOT EXISTS ix_book_price ON book (price)",
+    "CREATE INDEX IF NOT EXISTS ix_book_rating ON book (rating)",
+    "CREATE INDEX IF NOT EXISTS ix_book_position ON book (position)",
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(
+        title, category, description,
+        content='book', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+]
+REBUILD_BOOK_FTS = "INSERT INTO book_fts(book_fts) VALUES ('rebuild')"
+# Tabelas `book` anteriores à coluna position são descartadas e recarregadas
+OUTDATED_BOOK_TABLE = (
+    "SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book') "
+    "AND NOT EXISTS (SELECT 1 FROM pragma_table_info('book') WHERE name = 'position')"
+)
+DROP_BOOK_TABLES = ["DROP TABLE IF EXISTS book_fts", "DROP TABLE IF EXISTS book"]
+META_SCHEMA = "CREATE TABLE IF NOT EXISTS catalogue_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+# Nova marca de versão a cada carga da tabela `book` (importação do CSV ou scraping --format db)
+BUMP_BOOK_VERSION = (
+    "INSERT OR REPLACE INTO catalogue_meta (key, value) VALUES ('book_version', lower(hex(randomblob(8))))"
+)
+# Linhas do scraping em andamento com --format db, publicadas em `book` só no fim
+STAGING_TABLE = 'book_staging'
+STAGING_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {STAGING_TABLE} (
+        id INTEGER NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        category VARCHAR(80) NOT NULL,
+        price FLOAT NOT NULL,
+        stock INTEGER NOT NULL,
+        image VARCHAR(255),
+        rating INTEGER NOT NULL,
+        link VARCHAR(255),
+        description TEXT,
+        position INTEGER NOT NULL
+    )
+"""
+
+
+class Checkpoint:
+    """Posição da última URL concluída e o tamanho da saída naquele momento."""
+
+    def __init__(self, path):
+        self.path = path
+        self.position = 0
+        self.last_url = None
+        self.offset = None
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.position = state['position']
+            self.last_url = state['last_url']
+            self.offset = state['offset']
+
+    @property
+    def resuming(self):
+        return self.position > 0
+
+    def save(self, position, last_url, offset):
+        self.position, self.last_url, self.offset = position, last_url, offset
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'position': position, 'last_url': last_url, 'offset': offset}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class PreviousRows:
+    """Linhas da última saída completa, lidas do disco pelo Link quando pedidas.
+
+    Na memória fica só onde cada linha está (offset no arquivo ou id no
+    banco), não as linhas: reaproveitar a saída anterior não carrega o
+    catálogo inteiro. `close` fecha o arquivo ou a conexão usados na leitura.
+    """
+
+    def __init__(self, keys=None, read=None, close=None):
+        self._keys = keys or {}
+        self._read = read
+        self._close = close
+
+    def __contains__(self, link):
+        return link in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, link):
+        return self._read(self._keys[link])
+
+    def get(self, link, default=None):
+        return self[link] if link in self._keys else default
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+
+def _lines(f):
+    """Linhas de um arquivo binário, decodificadas; `f.tell()` continua valendo entre elas."""
+    for line in iter(f.readline, b''):
+        yield line.decode('utf-8')
+
+
+class _FileWriter:
+    def __init__(self, path, fieldnames=FIELDNAMES):
+        self.path = path
+        self.partial = path + '.partial'
+        self.fieldnames = fieldnames
+        self._file = None
+
+    def open(self, offset=None):
+        """Abre a saída parcial; com `offset`, retoma descartando o que passou do checkpoint."""
+        if offset is not None and os.path.exists(self.partial):
+            self._file = open(self.partial, 'r+', newline='', encoding='utf-8')
+            self._file.seek(offset)
+            self._file.truncate()
+            self._attach()
+        else:
+            self._file = open(self.partial, 'w', newline='', encoding='utf-8')
+            self._attach()
+            self._start()
+        return self
+
+    def _attach(self):
+        pass
+
+    def _start(self):
+        pass
+
+    def flush(self):
+        """Garante que as linhas já escritas estão no disco e devolve o offset atual."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def commit(self):
+        self.close()
+        os.replace(self.partial, self.path)
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+class CsvWriter(_FileWriter):
+    def _attach(self):
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+
+    def _start(self):
+        self._writer.writeheader()
+
+    def write(self, row):
+        self._writer.writerow(row)
+
+    def previous(self):
+        """Linhas da última saída completa, indexadas pelo Link."""
+        if not os.path.exists(self.path):
+            return PreviousRows()
+        f = open(self.path, 'rb')
+        reader = csv.reader(_lines(f))
+        header = next(reader, [])
+        keys = {}
+        if 'Link' in header:
+            link = header.index('Link')
+            start = f.tell()
+            for row in reader:
+                # O csv.reader só pede a próxima linha quando precisa, então tell() é o fim deste registro
+                if len(row) > link and row[link]:
+                    keys[row[link]] = start
+                start = f.tell()
+
+        def read(offset):
+            f.seek(offset)
+            return dict(zip(header, next(csv.reader(_lines(f)))))
+
+        return PreviousRows(keys, read, f.close)
+
+
+class JsonLinesWriter(_FileWriter):
+    def write(self, row):
+        self._file.write(json.dumps({name: row[name] for name in self.fieldnames}, ensure_ascii=False) + '\n')
+
+    def previous(self):
+        if not os.path.exists(self.path):
+            return PreviousRows()
+        f = open(self.path, 'rb')
+        keys = {}
+        start = f.tell()
+        for line in iter(f.readline, b''):
+            if line.strip():
+                keys[json.loads(line)['Link']] = start
+            start = f.tell()
+
+        def read(offset):
+            f.seek(offset)
+            return json.loads(f.readline())
+
+        return PreviousRows(keys, read, f.close)
+
+
+class DatabaseWriter:
+    """Grava as linhas em uma tabela de preparo e só no `commit` as publica na tabela `book`.
+
+    Enquanto o scraping roda, a API continua lendo a tabela `book` anterior e
+    o seu índice FTS. O `commit` troca o conteúdo de `book` pelo da tabela de
+    preparo (o que também remove os livros que saíram do products.csv) e
+    reconstrói o FTS na mesma transação, como o rename de `.partial` dos
+    destinos em arquivo. O offset do checkpoint é o número de linhas já
+    gravadas na tabela de preparo.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._count = 0
+        columns = ', '.join([*BOOK_COLUMNS.values(), 'position'])
+        params = ', '.join(f':{name}' for name in [*BOOK_COLUMNS, 'position'])
+        self._insert = f'INSERT INTO {STAGING_TABLE} ({columns}) VALUES ({params})'
+        # Ordem do rowid: se um id aparece duas vezes, vale a última linha, como antes
+        self._publish = (f'INSERT OR REPLACE INTO book ({columns}) '
+                         f'SELECT {columns} FROM {STAGING_TABLE} ORDER BY rowid')
+
+    def open(self, offset=None):
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        if offset is None:
+            self._conn.execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}')
+        self._conn.execute(STAGING_SCHEMA)
+        # Retomando: descarta o que passou do checkpoint
+        self._conn.execute(f'DELETE FROM {STAGING_TABLE} WHERE rowid > ?', (offset or 0,))
+        self._conn.commit()
+        self._count = offset or 0
+        return self
+
+    def write(self, row):
+        self._conn.execute(self._insert, {**row, 'position': self._count})
+        self._count += 1
+
+    def flush(self):
+        self._conn.commit()
+        return self._count
+
+    def commit(self):
+        self.flush()
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        if conn.execute(OUTDATED_BOOK_TABLE).fetchone()[0]:
+            for statement in DROP_BOOK_TABLES:
+                conn.execute(statement)
+        for statement in BOOK_SCHEMA + [META_SCHEMA]:
+            conn.execute(statement)
+        conn.execute('DELETE FROM book')
+        conn.execute(self._publish)
+        conn.execute(f'DROP TABLE {STAGING_TABLE}')
+        # O índice FTS é reconstruído uma vez, junto com a troca
+        conn.execute(REBUILD_BOOK_FTS)
+        conn.execute(BUMP_BOOK_VERSION)
+        conn.commit()
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def previous(self):
+        """Linhas publicadas da tabela `book`, lidas sem alterar o banco."""
+        if not os.path.exists(self.path):
+            return PreviousRows()
+        conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book'").fetchone():
+            conn.close()
+            return PreviousRows()
+        keys = dict(conn.execute('SELECT link, id FROM book WHERE link IS NOT NULL'))
+        select = ', '.join(f'{column} AS "{name}"' for name, column in BOOK_COLUMNS.items())
+        conn.row_factory = sqlite3.Row
+
+        def read(id):
+            return dict(conn.execute(f'SELECT {select} FROM book WHERE id = ?', (id,)).fetchone())
+
+        return PreviousRows(keys, read, conn.close)
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'jsonl': JsonLinesWriter,
+    'db': DatabaseWriter,
+}
@@ -1,89 +1,199 @@
-import requests
+import argparse
 import csv
-from bs4 import BeautifulSoup
-
-n = 0
-web_scraping = []
-
-# Lê as colunas url (posição 0) e index (posição 1) do CSV
-with open('../data/products.csv', 'r', encoding='utf-8') as f:                    # Abertura do Arquivo que Contém as Informações URL e Index
-    reader = csv.reader(f)                                                        # 'reader' Recebe o Arquivo
-    next(reader)                                                                  # Próxima Linha 
-    books = []                                                                    # Criação de Lista que Irá Armazenar a URL
-    indices = []                                                                  # Criação de Lista que Irá Armazenar o Index
-    for row in reader:                                                            # Para Cada Elemento Dentro de 'reader'
-        if row:                                                                   # Se Existir Linha
-            books.append(row[0].strip())                                          # Preenchimento de Lista Contendo a URL para Scraping
-            indices.append(row[1].strip())                                        # Preenchimento de Lista Contendo o Index
+import json
+import os
+import sys
+import time
 
-url0 = 'https://books.toscrape.com/'                                              # URL Base
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA = os.path.join(ROOT, 'data')
+sys.path.insert(0, ROOT)
+
+from catalogue import build_snapshot  # noqa: E402
+from scraping import BACKENDS, WRITERS, Checkpoint, Crawler, PageCache, ParserPool  # noqa: E402
 
-while n < len(books) and requests.get(books[n]).status_code == 200:               # Enquanto n for Menor que a Quantidade de Linhas e o Request for Acessível
-    url = books[n]                                                                # URL Recebe o Link da Lista Contendo a URL 
-    r = requests.get(url)                                                         # Requisição pela URL
-    soup = BeautifulSoup(r.text, 'html.parser')                                   # Soup Receberá o Conteúdo HTML
-
-    # Título e categoria
-    breadcrumb = soup.select('ul.breadcrumb li')                                  # Selecionou-se os Elementos Dentro de <ul class=breadcrumb><li></li> Criando Assim uma Lista
-    title = breadcrumb[3].text.strip()                                            # Extrai-se o Título
-    category = breadcrumb[2].text.strip()                                         # Extrai-se a Categoria
-
-    # Preço
-    price = soup.select_one('p.price_color').text.strip()[2:]                    # Seleciona-se o Elemento Dentro de <p class=price_color></p> e se Retira os 2 Primeiros Caracteres
-
-    # Estoque
-    stock = soup.select('table.table-striped td')[5].text.strip()                # Seleciona-se o 5º Elemento Dentro de <table class=table-striped><td></td> 
-    stock = stock[:-10]                                                          # Retira-se os 10 Últimos Caracteres
-    stock = stock[10:]                                                           # Retira-se os 10 Primeiros Caracteres
-    stock = int(stock)                                                           # Transforma-se o Valor em um Dado Tipo int
-
-    # Imagem
-    img_tag = soup.select_one('#product_gallery img')                           
-    img_url = url0 + img_tag['src'][6:] if img_tag else 'not found'
-
-    # Descrição
-    desc_div = soup.find('div', id='product_description')
-    if desc_div:
-        desc_p = desc_div.find_next_sibling('p')
-        description = desc_p.text.strip() if desc_p else 'not found'
-    else:
-        description = 'not found'
-
-    # Rating
-    p_tag = soup.find('p', class_='star-rating')
-    rating = p_tag['class'][1] if p_tag and len(p_tag['class']) > 1 else 'not found'
-    rating = {
-        'One': 1,
-        'Two': 2,
-        'Three': 3,
-        'Four': 4,
-        'Five': 5
-    }.get(rating, 0)
-
-    # Pega o index correspondente
-    index = indices[n]
-
-    scrap = {
-        'Title': title,
-        'Category': category,
-        'Price': price,
-        'Stock': stock,
-        'Image': img_url,
-        'Rating': rating,
+url0 = 'https://books.toscrape.com/'                                              # URL Base
+OUTPUTS = {
+    'csv': os.path.join(DATA, 'web_scraping.csv'),
+    'jsonl': os.path.join(DATA, 'web_scraping.jsonl'),
+    'db': os.path.join(ROOT, 'instance', 'meubanco.db'),
+}
+CHECKPOINT_EVERY = 50                                                             # Linhas Entre Checkpoints
+PROGRESS_INTERVAL = 0.5                                                           # Segundos Entre Linhas de Progresso
+
+
+def read_products(path):
+    """Lê as colunas url (posição 0) e index (posição 1) do CSV de produtos."""
+    books = []                                                                    # Lista que Irá Armazenar a URL
+    indices = {}                                                                  # Index de Cada URL
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)                                                              # Pula o Cabeçalho
+        for row in reader:
+            if row:
+                url = row[0].strip()
+                books.append(url)
+                indices[url] = row[1].strip()
+    return books, indices
+
+
+def book_row(fields, url, index):
+    """Linha de web_scraping.csv a partir dos campos extraídos da página."""
+    return {
+        'Title': fields['title'],
+        'Category': fields['category'],
+        'Price': fields['price'],
+        'Stock': fields['stock'],
+        'Image': fields['image'] or 'not found',
+        'Rating': fields['rating'],
         'Link': url,
-        'Description': description,
+        'Description': fields['description'] or 'not found',
         'Index': index
     }
 
-    web_scraping.append(scrap)
-
-    print(f"{n}: {title} - {category} - £{price} - Stock: {stock} - Rating: {rating} - Index: {index}")
-
-    n +=1  # Incrementa para a próxima URL
 
-# Salva no CSV final com os nomes corretos
-with open('../data/web_scraping.csv', 'w', newline='', encoding='utf-8') as f:
-    fieldnames = ['Título', 'Categoria', 'Preço (£)', 'Estoque', 'Imagem', 'Rating', 'Link', 'Descrição', 'Index']
-    writer = csv.DictWriter(f, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(web_scraping)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Scraping das páginas de produto listadas em products.csv')
+    parser.add_argument('--products', default=os.path.join(DATA, 'products.csv'))
+    parser.add_argument('--format', choices=WRITERS, default='csv',
+                        help='Destino: CSV, JSON Lines ou a tabela book do banco da API')
+    parser.add_argument('--output', default=None, help='Arquivo de saída (padrão depende do formato)')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignora o checkpoint de uma execução interrompida e começa do zero')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requisições simultâneas')
+    parser.add_argument('--rate', type=float, default=None, help='Máximo de requisições por segundo por host')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=10, help='Timeout de conexão e de leitura, em segundos')
+    parser.add_argument('--base-url', default=url0,
+                        help='Substitui a URL base (ex.: servidor local com páginas salvas)')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='Processos de parsing (padrão: número de CPUs)')
+    parser.add_argument('--parser', choices=BACKENDS, default=BACKENDS[0], help='Backend de HTML')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reaproveita as linhas de páginas que não mudaram desde o último scraping')
+    parser.add_argument('--cache', default=os.path.join(DATA, 'page_cache.json'),
+                        help='Arquivo com ETag/Last-Modified e hash de cada página')
+    parser.add_argument('--no-snapshot', dest='snapshot', action='store_false',
+                        help='Não gera o snapshot colunar do CSV usado na partida da API')
+    parser.add_argument('--progress', action='store_true',
+                        help='Imprime linhas "PROGRESS {json}" com o andamento (usado pelos jobs da API)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = args.output or OUTPUTS[args.format]
+    books, indices = read_products(args.products)
+    # Permite apontar o crawler para um servidor local sem alterar o Link gravado
+    fetch_urls = {url: url.replace(url0, args.base_url, 1) for url in books}
+
+    writer = WRITERS[args.format](output)
+    checkpoint = Checkpoint(output + '.checkpoint')
+    if args.restart:
+        checkpoint.clear()
+        checkpoint = Checkpoint(checkpoint.path)
+    if checkpoint.resuming:
+        print(f"Retomando após {checkpoint.last_url} ({checkpoint.position} URLs concluídas)")
+
+    cache = PageCache(args.cache)
+    # Linhas da saída anterior: em qualquer modo substituem as páginas que falharem; no incremental,
+    # também as que não mudaram. São lidas do disco só quando usadas.
+    previous = writer.previous()
+    reusable = previous if args.incremental else {}
+    # Só faz requisição condicional para páginas cuja linha anterior ainda existe
+    cache.retain(fetch_urls[url] for url in books if url in reusable)
+    pending = {fetch_urls[url]: url for url in books[checkpoint.position:]}
+    counts = {'unchanged': 0, 'reparsed': 0, 'failed': 0}
+
+    def pages(crawler):
+        """Decide, na ordem do products.csv, quais páginas precisam de parsing."""
+        for result in crawler.fetch_all(pending):
+            url = pending[result.url]
+            if result.not_modified:
+                counts['unchanged'] += 1
+                yield url, None
+            elif not result.ok:
+                counts['failed'] += 1
+                print(f"falha em {url}: {result.error or result.status}")
+                yield url, None                                                  # Mantém a linha anterior, se houver
+            elif not cache.update(result.url, result) and url in reusable:
+                counts['unchanged'] += 1                                         # Mesmo conteúdo: não precisa reprocessar
+                yield url, None
+            else:
+                yield url, result.text
+
+    position = checkpoint.position
+    errors = 0
+    written = 0
+    resumed = checkpoint.resuming
+    last_progress = 0.0
+
+    def report(crawler, final=False):
+        """Linha de progresso lida por quem disparou o scraping (jobs.py)."""
+        nonlocal last_progress
+        now = time.perf_counter()
+        if not args.progress or (not final and now - last_progress < PROGRESS_INTERVAL):
+            return
+        last_progress = now
+        progress = {
+            'done': position,
+            'total': len(books),
+            'pages': crawler.stats.pages,
+            'pages_per_sec': round(crawler.stats.pages_per_sec, 1),
+            'errors': crawler.stats.errors + errors,
+        }
+        print('PROGRESS ' + json.dumps(progress), flush=True)
+
+    writer.open(checkpoint.offset if checkpoint.resuming else None)
+    try:
+        with Crawler(concurrency=args.concurrency, rate_per_host=args.rate, retries=args.retries,
+                     timeout=args.timeout, cache=cache if args.incremental else None) as crawler, \
+                ParserPool(args.parse_workers, args.parser) as parsers:
+            for url, fields, error in parsers.parse_all(pages(crawler)):
+                position += 1
+                if error:
+                    errors += 1
+                    print(f"erro ao processar {url}: {error}")
+                if fields is not None:
+                    scrap = book_row(fields, url, indices[url])
+                    writer.write(scrap)                                          # Grava a linha assim que fica pronta
+                    written += 1
+                    counts['reparsed'] += 1
+                    print(f"{scrap['Title']} - {scrap['Category']} - £{scrap['Price']} - Stock: {scrap['Stock']} "
+                          f"- Rating: {scrap['Rating']} - Index: {scrap['Index']}")
+                elif url in previous:
+                    writer.write(previous[url])
+                    written += 1
+
+                if position % CHECKPOINT_EVERY == 0:
+                    checkpoint.save(position, url, writer.flush())
+                report(crawler)
+
+            report(crawler, final=True)
+            print(crawler.stats.summary())
+            print(crawler.client.stats.summary())
+            print(f"Baixadas: {crawler.stats.pages} - Inalteradas: {counts['unchanged']} "
+                  f"- Reprocessadas: {counts['reparsed']} - Falhas: {counts['failed']}")
+    except BaseException:
+        # O cache não é salvo: ele teria páginas cujas linhas o checkpoint ainda não cobre
+        writer.close()
+        raise
+    finally:
+        previous.close()                                                          # Antes de substituir a saída anterior
+
+    if books and not resumed and (not written or counts['failed'] == len(pending)):
+        # Nenhuma página baixada (sem rede, site fora do ar): mantém a saída anterior
+        writer.close()
+        checkpoint.clear()
+        sys.exit("Nenhum livro obtido; a saída anterior foi mantida")
+
+    # Publica a saída completa e descarta o checkpoint
+    writer.commit()
+    cache.save()                                                                  # Só descreve páginas já publicadas
+    checkpoint.clear()
+    if args.format == 'csv' and args.snapshot:
+        print(f"Snapshot colunar gravado em {build_snapshot(output)}")
+
+
+if __name__ == '__main__':
+    main()
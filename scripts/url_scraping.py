@@ -1,67 +1,223 @@
-import requests
-import csv
+import argparse
+import os
+import re
+import sys
+
 from bs4 import BeautifulSoup
 
-base_url = 'https://books.toscrape.com/catalogue/page-{}.html'
-book_base_url = 'https://books.toscrape.com/catalogue/'
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from scraping import BACKENDS, Checkpoint, Crawler, CsvWriter, ParserPool  # noqa: E402
+
+site_url = 'https://books.toscrape.com/'
+base_url = site_url + 'catalogue/page-{}.html'
+book_base_url = site_url + 'catalogue/'
+FIELDNAMES = ['Título', 'Categoria', 'Preço (£)', 'Estoque', 'Descrição', 'Imagem', 'Link']
+CHECKPOINT_EVERY = 50
+TIERS = ['quick', 'detail']
+
+
+def page_count(html):
+    """Lê o total de páginas do paginador ("Page 1 of 50")."""
+    soup = BeautifulSoup(html, 'html.parser')
+    current = soup.select_one('ul.pager li.current')
+    match = re.search(r'of\s+(\d+)', current.text) if current else None
+    return int(match.group(1)) if match else 1
+
+
+def listing_books(html):
+    """Livros de uma página do catálogo, com os campos que a própria listagem traz.
+
+    Categoria, descrição e estoque exato só existem na página de cada livro;
+    a imagem da listagem é a miniatura.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    books = []
+    for book in soup.select("article.product_pod"):
+        link = book.find('h3').find('a')
+        image = book.select_one('img')
+        availability = book.select_one('p.availability')
+        books.append({
+            'Título': link.get('title') or link.text.strip(),
+            'Preço (£)': book.select_one('p.price_color').text.strip().lstrip('Â£'),
+            'Estoque': availability.text.strip() if availability else '',
+            'Imagem': site_url + image['src'].replace('../', '') if image else '',
+            'Link': book_base_url + link['href'].replace('../../../', ''),
+        })
+    return books
+
+
+def same_availability(book, previous):
+    """A listagem só diz "In stock"; a linha anterior pode ter "In stock (19 available)"."""
+    return previous['Estoque'].startswith(book['Estoque'])
+
+
+def changed(book, previous):
+    """True se título, preço ou disponibilidade da listagem diferem da linha anterior do livro."""
+    return (previous['Título'] != book['Título'] or previous['Preço (£)'] != book['Preço (£)']
+            or not same_availability(book, previous))
+
+
+def needs_details(book, previous):
+    """A página do livro só é baixada para livros novos, alterados ou que ainda não têm os detalhes."""
+    return previous is None or not previous['Categoria'] or changed(book, previous)
+
 
-web_scraping = []
-page = 1
+def listing_row(book, previous):
+    """Linha com os dados da listagem; o que ela não traz vem da linha anterior do mesmo livro.
 
-while True:
-    url = base_url.format(page)
-    r = requests.get(url)
-    
-    if r.status_code != 200:
-        break
+    Sem linha anterior, a categoria fica vazia (desconhecida) e a descrição
+    recebe o mesmo texto de `book_row` para livros sem descrição.
+    """
+    row = {**book, 'Categoria': '', 'Descrição': 'Sem descrição'}
+    if previous is not None:
+        row.update({'Categoria': previous['Categoria'], 'Descrição': previous['Descrição'],
+                    'Imagem': previous['Imagem']})
+        if same_availability(book, previous):
+            row['Estoque'] = previous['Estoque']                                 # Estoque exato da última página do livro
+    return row
 
-    print(f'Scraping página {page}...')
-    soup = BeautifulSoup(r.text, 'html.parser')
-    books = soup.select("article.product_pod")
 
-    for book in books:
-        h3_tag = book.find('h3')
-        a_tag = h3_tag.find('a')
-        book_href = a_tag['href']
-        book_url = book_base_url + book_href.replace('../../../', '')
+def book_row(fields, link):
+    return {
+        'Título': fields['title'],
+        'Categoria': fields['category'],
+        'Preço (£)': fields['price'],
+        'Estoque': fields['availability'],
+        'Descrição': fields['description'] or 'Sem descrição',
+        'Imagem': fields['image'],
+        'Link': link,
+    }
 
-        # Acessa a página do livro individual
-        r_book = requests.get(book_url)
-        soup_book = BeautifulSoup(r_book.text, 'html.parser')
 
-        # Extrai os dados
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Scraping do catálogo completo de books.toscrape.com')
+    parser.add_argument('--output', default=os.path.join(ROOT, 'data', 'books_detalhados.csv'))
+    parser.add_argument('--concurrency', type=int, default=16, help='Requisições simultâneas')
+    parser.add_argument('--rate', type=float, default=None, help='Máximo de requisições por segundo por host')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=10, help='Timeout de conexão e de leitura, em segundos')
+    parser.add_argument('--base-url', default=site_url,
+                        help='Substitui a URL base (ex.: servidor local com páginas salvas)')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='Processos de parsing (padrão: número de CPUs)')
+    parser.add_argument('--parser', choices=BACKENDS, default=BACKENDS[0], help='Backend de HTML')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignora o checkpoint de uma execução interrompida e começa do zero')
+    parser.add_argument('--tier', choices=TIERS, default='detail',
+                        help='quick: só as páginas do catálogo (preço e disponibilidade); detail: também as páginas dos '
+                             'livros novos ou alterados')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    def local(url):
+        return url.replace(site_url, args.base_url, 1)
+
+    writer = CsvWriter(args.output, FIELDNAMES)
+    checkpoint = Checkpoint(args.output + '.checkpoint')
+    if args.restart:
+        checkpoint.clear()
+        checkpoint = Checkpoint(checkpoint.path)
+    # Linhas da última execução, para não baixar de novo a página de livros que não mudaram
+    previous = writer.previous()
+
+    with Crawler(concurrency=args.concurrency, rate_per_host=args.rate, retries=args.retries,
+                 timeout=args.timeout) as crawler, \
+            ParserPool(args.parse_workers if args.tier == 'detail' else 0, args.parser) as parsers:
+        # A primeira página informa quantas páginas o catálogo tem; as demais são buscadas em paralelo
+        first = crawler.fetch(local(base_url.format(1)))
+        if not first.ok:
+            print(f'Falha ao acessar o catálogo: {first.error or first.status}')
+            return
+        pages = [first]
+        total = page_count(first.text)
+        pages += crawler.fetch_all(local(base_url.format(page)) for page in range(2, total + 1))
+
+        books = {}                                                               # Livros por Link, na ordem do catálogo
+        failed = 0
+        for page, r in enumerate(pages, start=1):
+            if not r.ok:
+                print(f'Falha na página {page}: {r.error or r.status}')
+                failed += 1
+                continue
+            print(f'Scraping página {page}...')
+            for book in listing_books(r.text):
+                # Um livro que mudou de página durante o crawling aparece duas vezes: vale a primeira
+                books.setdefault(book['Link'], book)
+        if failed:
+            # Os livros dessas páginas sumiriam do CSV: mantém a saída anterior e o checkpoint
+            sys.exit(f'Falha em {failed} página(s) do catálogo; a saída anterior foi mantida')
+
+        links = list(books)
+        done = links.index(checkpoint.last_url) + 1 if checkpoint.last_url in books else None
+        if checkpoint.resuming and done != checkpoint.position:
+            # O catálogo mudou desde a interrupção: a saída parcial não corresponde mais ao início da lista
+            print(f"{checkpoint.last_url} mudou de posição no catálogo; recomeçando do zero")
+            checkpoint.clear()
+            checkpoint = Checkpoint(checkpoint.path)
+        elif checkpoint.resuming:
+            print(f"Retomando após {checkpoint.last_url} ({checkpoint.position} livros concluídos)")
+
+        # Retoma logo depois do último livro concluído
+        remaining = [books[link] for link in links[done if checkpoint.resuming else 0:]]
+        details = {book['Link'] for book in remaining
+                   if args.tier == 'detail' and needs_details(book, previous.get(book['Link']))}
+
+        def book_pages():
+            # Só acessa as páginas individuais dos livros que precisam de detalhes; cada resposta é
+            # ligada ao seu livro pela URL
+            fetched = crawler.fetch_all(local(book['Link']) for book in remaining if book['Link'] in details)
+            results = {}
+            for book in remaining:
+                if book['Link'] not in details:
+                    yield book, None
+                    continue
+                url = local(book['Link'])
+                while url not in results:
+                    r_book = next(fetched)
+                    results[r_book.url] = r_book
+                r_book = results.pop(url)
+                if not r_book.ok:
+                    print(f"Erro ao acessar livro em {book['Link']}: {r_book.error or r_book.status}")
+                yield book, r_book.text if r_book.ok else None
+
+        # O parsing roda no pool de processos enquanto as próximas páginas são baixadas
+        position = checkpoint.position
+        counts = {'details': 0, 'listing': 0}
+        writer.open(checkpoint.offset if checkpoint.resuming else None)
         try:
-            titulo = soup_book.find('h1').text.strip()
-            categoria = soup_book.select('ul.breadcrumb li a')[-1].text.strip()
-            preco = soup_book.find('p', class_='price_color').text.strip().replace('£', '')
-            estoque = soup_book.find('p', class_='instock availability').text.strip()
-            descricao_tag = soup_book.find('div', id='product_description')
-            descricao = descricao_tag.find_next_sibling('p').text.strip() if descricao_tag else 'Sem descrição'
-            imagem = 'https://books.toscrape.com/' + soup_book.find('img')['src'].replace('../', '')
-        except Exception as e:
-            print(f"Erro ao processar livro em {book_url}: {e}")
-            continue
-
-        # Cria o dicionário com os dados
-        livro = {
-            'Título': titulo,
-            'Categoria': categoria,
-            'Preço (£)': preco,
-            'Estoque': estoque,
-            'Descrição': descricao,
-            'Imagem': imagem
-        }
-
-        web_scraping.append(livro)
-
-    page += 1  # Próxima página
-
-# Salva os dados em CSV
-with open('../data/books_detalhados.csv', 'w', newline='', encoding='utf-8') as f:
-    fieldnames = ['Título', 'Categoria', 'Preço (£)', 'Estoque', 'Descrição', 'Imagem']
-    writer = csv.DictWriter(f, fieldnames=fieldnames)
-
-    writer.writeheader()
-    writer.writerows(web_scraping)
-
-print("Scraping finalizado com sucesso!")
+            for book, fields, error in parsers.parse_all(book_pages()):
+                position += 1
+                if error:
+                    print(f"Erro ao processar livro em {book['Link']}: {error}")
+                if fields is not None:
+                    writer.write(book_row(fields, book['Link']))                 # Grava o livro assim que fica pronto
+                    counts['details'] += 1
+                else:
+                    writer.write(listing_row(book, previous.get(book['Link'])))
+                    counts['listing'] += 1
+                if position % CHECKPOINT_EVERY == 0:
+                    checkpoint.save(position, book['Link'], writer.flush())
+        except BaseException:
+            writer.close()
+            raise
+        finally:
+            previous.close()                                                      # Antes de substituir a saída anterior
+
+        print(crawler.stats.summary())
+        print(crawler.client.stats.summary())
+        print(f"Livros com página de detalhes baixada: {counts['details']} - "
+              f"só com dados da listagem: {counts['listing']}")
+
+    # Publica o CSV completo e descarta o checkpoint
+    writer.commit()
+    checkpoint.clear()
+    print("Scraping finalizado com sucesso!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Índice invertido usado pela busca de livros.
+
+O índice é montado uma vez, na carga do catálogo, sobre Title, Category e
+Description. Cada termo aponta para as linhas onde aparece e quantas vezes;
+a busca combina os termos da consulta (todos precisam aparecer), aceita
+prefixos e ordena o resultado por relevância (tf-idf ponderado por campo).
+
+As listas de linhas ficam em arrays do NumPy, um por campo, e não em
+dicionários por termo: o índice ocupa bem menos memória e, quando é montado
+antes do fork dos workers do gunicorn, as páginas dos arrays continuam
+compartilhadas (ler um array não altera contadores de referência).
+"""
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+import numpy as np
+
+TOKEN = re.compile(r"\w+")
+FIELD_WEIGHTS = {"Title": 3.0, "Category": 2.0, "Description": 1.0}
+MIN_PREFIX = 2
+PREFIX_WEIGHT = 0.5  # termos que só casam como prefixo valem menos que a palavra exata
+
+
+def tokenize(text):
+    """Termos em minúsculas e sem acentos."""
+    tokens = TOKEN.findall(str(text).lower())
+    if not all(token.isascii() for token in tokens):
+        tokens = [token if token.isascii() else _strip_accents(token) for token in tokens]
+    return tokens
+
+
+def _strip_accents(token):
+    return "".join(c for c in unicodedata.normalize("NFKD", token) if not unicodedata.combining(c))
+
+
+class SearchIndex:
+    def __init__(self, columns, weights=FIELD_WEIGHTS):
+        """`columns` mapeia cada campo de `weights` para os textos de cada linha."""
+        self.size = len(columns[next(iter(weights))])
+        self.weights = weights
+        # campo -> termo -> {linha: frequência}, só durante a montagem
+        postings = {field: defaultdict(dict) for field in weights}
+        for field in weights:
+            field_postings = postings[field]
+            for row, text in enumerate(columns[field]):
+                if not isinstance(text, str):
+                    continue
+                for term, tf in Counter(tokenize(text)).items():
+                    field_postings[term][row] = tf
+        self.vocabulary = sorted({term for field_postings in postings.values() for term in field_postings})
+        # Por campo, as listas de cada termo (na ordem do vocabulário) ficam em arrays contíguos:
+        # as linhas do termo i estão em rows[offsets[i]:offsets[i + 1]], com o peso 1 + log(tf) em tf_weights
+        self.offsets = {}
+        self.rows = {}
+        self.tf_weights = {}
+        for field, field_postings in postings.items():
+            lists = [field_postings.get(term, {}) for term in self.vocabulary]
+            self.offsets[field] = np.cumsum([0] + [len(rows) for rows in lists], dtype=np.int64)
+            self.rows[field] = np.fromiter(
+                (row for rows in lists for row in rows), dtype=np.int32, count=int(self.offsets[field][-1])
+            )
+            self.tf_weights[field] = np.fromiter(
+                (1 + math.log(tf) for rows in lists for tf in rows.values()),
+                dtype=np.float64,
+                count=int(self.offsets[field][-1]),
+            )
+
+    def _expand(self, token, prefix):
+        """Posições no vocabulário dos termos que casam com `token` (ele próprio ou com ele como prefixo)."""
+        i = bisect_left(self.vocabulary, token)
+        if not prefix or len(token) < MIN_PREFIX:
+            return [i] if i < len(self.vocabulary) and self.vocabulary[i] == token else []
+        terms = []
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(token):
+            terms.append(i)
+            i += 1
+        return terms
+
+    def _score_token(self, token, fields, prefix):
+        """Pontuação de cada linha para `token` e a máscara das linhas em que ele aparece."""
+        scores = np.zeros(self.size)
+        found = np.zeros(self.size, dtype=bool)
+        for term in self._expand(token, prefix):
+            for field in fields:
+                start, end = self.offsets[field][term], self.offsets[field][term + 1]
+                if start == end:
+                    continue
+                rows = self.rows[field][start:end]
+                idf = math.log(1 + self.size / (end - start))
+                weight = self.weights[field] * idf * (1.0 if self.vocabulary[term] == token else PREFIX_WEIGHT)
+                scores[rows] += weight * self.tf_weights[field][start:end]
+                found[rows] = True
+        return scores, found
+
+    def search(self, query, fields=None, prefix=True):
+        """Linhas que contêm todos os termos de `query`, da mais para a menos relevante."""
+        fields = fields or list(self.weights)
+        total = found = None
+        for token in tokenize(query):
+            scores, token_found = self._score_token(token, fields, prefix)
+            if total is None:
+                total, found = scores, token_found
+            else:
+                total += scores
+                found &= token_found
+            if not found.any():
+                return []
+        if total is None:
+            return []
+        rows = np.flatnonzero(found)
+        return rows[np.lexsort((rows, -total[rows]))].tolist()
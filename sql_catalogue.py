@@ -0,0 +1,376 @@
+"""Catálogo de livros servido pelas tabelas `book` e `book_fts` do SQLite.
+
+Alternativa ao snapshot em memória de `catalogue.py`, ativada com
+`CATALOGUE_BACKEND = 'sqlite'`. Cada consulta dos endpoints vira uma query
+indexada, então a memória do processo não cresce com o catálogo e vários
+processos compartilham o mesmo banco. `SqlCatalogue` expõe a mesma interface
+de `Catalogue` e de `CatalogueStore`.
+"""
+import csv
+import fcntl
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from sqlalchemy import bindparam, event, text
+
+from catalogue import OVERVIEW_KEYS, aggregate, file_version
+from scraping.writers import (
+    BOOK_COLUMNS, BOOK_SCHEMA, BUMP_BOOK_VERSION, DROP_BOOK_TABLES, FIELDNAMES, META_SCHEMA, OUTDATED_BOOK_TABLE,
+    REBUILD_BOOK_FTS,
+)
+from search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+IN_CHUNK = 500
+ID_RANGE = (-2**63, 2**63 - 1)  # INTEGER do SQLite; ids fora dela não existem e nem podem ser parâmetro
+FTS_WEIGHTS = "3.0, 2.0, 1.0"  # title, category, description
+CONVERTERS = {"Price": float, "Stock": int, "Rating": int, "Index": int}
+SORT_COLUMNS = {"price": "price", "rating": "rating", "index": "id"}  # Sem sort: a ordem do CSV (position)
+
+
+def configure_sqlite(engine, wal=True, busy_timeout=5000):
+    """Ajusta cada nova conexão SQLite do `engine` para vários processos usando o mesmo banco.
+
+    Com o journal em WAL, as leituras não esperam uma escrita em andamento
+    (nem a bloqueiam); `busy_timeout` (ms) faz quem precisa escrever esperar
+    o lock em vez de falhar na hora com "database is locked".
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+        cursor.close()
+
+
+def create_book_tables(connection):
+    if connection.exec_driver_sql(OUTDATED_BOOK_TABLE).scalar():
+        for statement in DROP_BOOK_TABLES:
+            connection.exec_driver_sql(statement)
+    for statement in BOOK_SCHEMA + [META_SCHEMA]:
+        connection.exec_driver_sql(statement)
+
+
+def load_books(connection, path, batch_size=1000):
+    """Substitui o conteúdo da tabela `book` pelo CSV do scraping, em lotes, e troca a versão."""
+    create_book_tables(connection)
+    connection.exec_driver_sql("DELETE FROM book")
+    columns = [*BOOK_COLUMNS.values(), "position"]
+    insert = text(f"INSERT INTO book ({', '.join(columns)}) VALUES ({', '.join(f':{column}' for column in columns)})")
+
+    count = 0
+    batch = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for position, row in enumerate(csv.DictReader(f)):
+            values = {column: CONVERTERS.get(field, str)(row[field]) for field, column in BOOK_COLUMNS.items()}
+            values["position"] = position
+            batch.append(values)
+            if len(batch) >= batch_size:
+                connection.execute(insert, batch)
+                count += len(batch)
+                batch = []
+    if batch:
+        connection.execute(insert, batch)
+        count += len(batch)
+    connection.exec_driver_sql(REBUILD_BOOK_FTS)
+    connection.exec_driver_sql(BUMP_BOOK_VERSION)
+    return count
+
+
+def book_version(connection):
+    """Marca da última carga da tabela `book`; cadastros e logins no mesmo banco não a mudam."""
+    return connection.exec_driver_sql("SELECT value FROM catalogue_meta WHERE key = 'book_version'").scalar()
+
+
+def imported_version(connection):
+    """Versão do CSV importada por último na tabela `book` (por qualquer processo)."""
+    connection.exec_driver_sql(META_SCHEMA)
+    return connection.exec_driver_sql("SELECT value FROM catalogue_meta WHERE key = 'csv_version'").scalar()
+
+
+def set_imported_version(connection, version):
+    connection.exec_driver_sql(META_SCHEMA)
+    connection.exec_driver_sql(
+        "INSERT OR REPLACE INTO catalogue_meta (key, value) VALUES ('csv_version', ?)", (version,)
+    )
+
+
+def _match_expression(query, column=None):
+    """Consulta FTS5 em que cada termo casa como prefixo e todos são obrigatórios."""
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    expression = " ".join(f'"{token}"*' for token in tokens)
+    return f"{column} : ({expression})" if column else f"({expression})"
+
+
+class SqlCatalogue:
+    columns = FIELDNAMES
+
+    def __init__(self, app, db, csv_path, dumps):
+        self.app = app
+        self.db = db
+        self.csv_path = csv_path
+        self.dumps = dumps
+        self.last_error = None
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._select = {
+            field: f"{column} AS \"{field}\"" for field, column in BOOK_COLUMNS.items()
+        }
+        with app.app_context(), self._import_lock():
+            db.create_all()
+            self._engine = db.engine
+            with db.engine.begin() as connection:
+                create_book_tables(connection)
+                empty = connection.exec_driver_sql("SELECT NOT EXISTS (SELECT 1 FROM book)").scalar()
+                if empty and os.path.exists(csv_path):
+                    load_books(connection, csv_path)
+                    set_imported_version(connection, file_version(csv_path))
+                if book_version(connection) is None:
+                    connection.exec_driver_sql(BUMP_BOOK_VERSION)
+        # O banco é considerado em dia com o CSV atual; mudanças futuras no CSV são reimportadas
+        self._csv_version = file_version(csv_path) if os.path.exists(csv_path) else None
+        self.loaded_at = time.time()
+
+    # Interface de CatalogueStore
+
+    def current(self):
+        return self
+
+    def refresh(self, force=False):
+        """Reimporta o CSV se ele mudou desde a última carga.
+
+        Com vários processos sobre o mesmo banco (workers do gunicorn), só um
+        importa cada versão do CSV: os demais esperam o lock de importação e
+        encontram a versão já registrada em `catalogue_meta`.
+        """
+        with self._lock:
+            try:
+                version = file_version(self.csv_path)
+                if not force and version == self._csv_version:
+                    return False
+                with self._import_lock(), self.app.app_context(), self.db.engine.begin() as connection:
+                    count = None
+                    if force or imported_version(connection) != version:
+                        count = load_books(connection, self.csv_path)
+                        set_imported_version(connection, version)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("Falha ao importar o catálogo %s", self.csv_path)
+                return False
+            self._csv_version = version
+            self.loaded_at = time.time()
+            self.last_error = None
+            if count is not None:
+                logger.info("Catálogo importado no banco: %d livros", count)
+            return True
+
+    @contextmanager
+    def _import_lock(self):
+        """Lock de arquivo (`flock`) que serializa as importações entre processos."""
+        with open(self.csv_path + ".import.lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+
+    def refresh_async(self, force=False):
+        thread = threading.Thread(target=self.refresh, kwargs={"force": force}, daemon=True)
+        thread.start()
+        return thread
+
+    def watch(self, interval):
+        """Verifica o arquivo a cada `interval` segundos em uma thread de fundo (de novo, depois de `stop`)."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop = stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=run, name="catalogue-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self, wait=False):
+        self._stop.set()
+        if wait and self._watcher is not None:
+            self._watcher.join()
+
+    # Interface de Catalogue
+
+    def warm(self):
+        """Nada a montar antes das requisições: as consultas vão direto ao banco."""
+        return self
+
+    def _execute(self, sql, **params):
+        statement = text(sql)
+        for name, value in params.items():
+            if isinstance(value, (list, tuple)):
+                statement = statement.bindparams(bindparam(name, expanding=True))
+        return self.db.session.execute(statement, params)
+
+    @property
+    def version(self):
+        """Marca da última carga da tabela `book`, gravada em `catalogue_meta` por quem a recarrega.
+
+        Escritas de outras tabelas (cadastro, login) não mudam a versão, então
+        não descartam o cache de respostas nem os ETags.
+        """
+        with self._engine.connect() as connection:
+            return book_version(connection)
+
+    @property
+    def size(self):
+        return self._execute("SELECT COUNT(*) FROM book").scalar()
+
+    @property
+    def categories(self):
+        return self._execute(
+            "SELECT DISTINCT category FROM book WHERE category != '' ORDER BY category"
+        ).scalars().all()
+
+    def titles(self):
+        return self._execute("SELECT title FROM book ORDER BY position").scalars().all()
+
+    def book_json(self, index):
+        records = self.records([index])
+        return self.dumps(records, separators=(",", ":")) if records else None
+
+    def _search_query(self, q="", title="", category=""):
+        """SQL e parâmetros da busca, ou None se nenhum livro pode atender."""
+        matches = []
+        for query, column in ((q, None), (title, "title")):
+            if query:
+                expression = _match_expression(query, column)
+                if expression is None:
+                    return None
+                matches.append(expression)
+
+        filters, params = [], {}
+        if category:
+            params["categories"] = [name for name in self.categories if category.lower() in name.lower()]
+            if not params["categories"]:
+                return None
+            filters.append("book.category IN :categories")
+
+        if matches:
+            params["match"] = " AND ".join(matches)
+            where = " AND ".join(["book_fts MATCH :match"] + filters)
+            sql = (
+                "SELECT book.id FROM book_fts JOIN book ON book.id = book_fts.rowid "
+                f"WHERE {where} ORDER BY bm25(book_fts, {FTS_WEIGHTS}), book.position"
+            )
+        else:
+            where = f"WHERE {' AND '.join(filters)} " if filters else ""
+            sql = f"SELECT id FROM book {where}ORDER BY position"
+        return sql, params
+
+    def search(self, q="", title="", category=""):
+        """Ids dos livros que atendem a busca; com `q` ou `title`, ordenados por relevância."""
+        query = self._search_query(q, title, category)
+        if query is None:
+            return []
+        sql, params = query
+        return self._execute(sql, **params).scalars().all()
+
+    def _aggregate(self, sql=None, **params):
+        """Facetas das linhas (category, rating, price, stock) devolvidas por `sql`."""
+        rows = self._execute(sql, **params).all() if sql else []
+        category, rating, price, stock = (
+            np.array(column) for column in (zip(*rows) if rows else ([], [], [], []))
+        )
+        categories, codes = np.unique(category.astype(str), return_inverse=True)
+        if len(categories) and categories[0] == "":
+            # Livros sem categoria ficam fora da lista de categorias, como no catálogo em memória
+            categories, codes = categories[1:], codes - 1
+        return aggregate(
+            categories.tolist(), codes, rating.astype(np.int64), price.astype(np.float64), stock.astype(np.int64)
+        )
+
+    def facets(self, q="", title="", category=""):
+        """Facetas dos livros que atendem a busca, agregadas sobre o resultado da query."""
+        if not (q or title or category):
+            return self._materialized()[2]
+        query = self._search_query(q, title, category)
+        if query is None:
+            return self._aggregate()
+        sql, params = query
+        return self._aggregate(f"SELECT category, rating, price, stock FROM book WHERE id IN ({sql})", **params)
+
+    def top_rated(self):
+        return self._execute("SELECT id FROM book WHERE rating = 5 ORDER BY position").scalars().all()
+
+    def price_range(self, min_price=None, max_price=None, category="", rating=None, sort=None, descending=False):
+        filters, params = [], {}
+        if min_price is not None:
+            filters.append("price >= :min_price")
+            params["min_price"] = min_price
+        if max_price is not None:
+            filters.append("price <= :max_price")
+            params["max_price"] = max_price
+        if category:
+            params["categories"] = [name for name in self.categories if category.lower() in name.lower()]
+            if not params["categories"]:
+                return []
+            filters.append("category IN :categories")
+        if rating is not None:
+            filters.append("rating = :rating")
+            params["rating"] = rating
+        where = f"WHERE {' AND '.join(filters)} " if filters else ""
+        direction = "DESC" if descending else "ASC"
+        order = f"position {direction}"
+        if sort in SORT_COLUMNS:
+            order = f"{SORT_COLUMNS[sort]} {direction}, {order}"
+        return self._execute(f"SELECT id FROM book {where}ORDER BY {order}", **params).scalars().all()
+
+    def records(self, ids, columns=None):
+        """Livros com os `ids` informados, na mesma ordem, como dicionários."""
+        columns = list(columns or self.columns)
+        return [dict(zip(columns, row)) for row in self._rows(ids, columns)]
+
+    def column_values(self, ids, columns):
+        """Valores de cada coluna de `columns` para os `ids`, na mesma ordem."""
+        rows = self._rows(ids, columns)
+        return [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+
+    def _rows(self, ids, columns):
+        select = ", ".join(self._select[field] for field in columns)
+        ids = [id for id in map(int, ids) if ID_RANGE[0] <= id <= ID_RANGE[1]]
+        found = {}
+        for start in range(0, len(ids), IN_CHUNK):
+            chunk = ids[start:start + IN_CHUNK]
+            result = self._execute(f"SELECT id AS _id, {select} FROM book WHERE id IN :ids", ids=chunk)
+            for row in result:
+                found[row[0]] = row[1:]
+        return [found[id] for id in ids if id in found]
+
+    def _materialized(self):
+        """Estatísticas calculadas uma vez por versão do banco."""
+        version = self.version
+        stats = self._stats.get(version)
+        if stats is None:
+            facets = self._aggregate("SELECT category, rating, price, stock FROM book")
+            overview = {key: facets[key] for key in OVERVIEW_KEYS}
+            stats = (overview, facets["Categories"], facets)
+            self._stats = {version: stats}
+        return stats
+
+    @property
+    def overview(self):
+        return self._materialized()[0]
+
+    @property
+    def category_stats(self):
+        return self._materialized()[1]
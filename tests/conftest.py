@@ -0,0 +1,70 @@
+"""Servidor HTTP local usado pelos testes no lugar do books.toscrape.com."""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+
+class StubServer:
+    """Responde a cada caminho com os status programados em `responses`.
+
+    `responses[path]` é uma lista de status usada em ordem; o último se repete.
+    Caminhos sem programação respondem 200. O corpo é `pages[path]`, se houver
+    (ex.: páginas salvas do site), ou um HTML com o próprio caminho. `hits`
+    guarda `(caminho, horário)` de cada requisição recebida.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.pages = {}
+        self.hits = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status = stub.next_status(self.path)
+                body = stub.pages.get(self.path, f'<html><body>{self.path}</body></html>').encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def next_status(self, path):
+        with self._lock:
+            self.hits.append((path, time.monotonic()))
+            statuses = self.responses.get(path)
+            if not statuses:
+                return 200
+            return statuses.pop(0) if len(statuses) > 1 else statuses[0]
+
+    def url(self, path='/'):
+        return f'http://127.0.0.1:{self.server.server_port}{path}'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+import auth
+from auth import HasherBusy, PasswordHasher
+
+REQUEST_THREADS = 4  # Threads de um worker gthread
+
+
+def test_login_burst_leaves_a_request_thread_for_the_catalogue(monkeypatch):
+    stored = generate_password_hash('senha', method='pbkdf2:sha256:1')
+    hasher = PasswordHasher(workers=2, max_pending=32, method='pbkdf2:sha256:1', request_threads=REQUEST_THREADS)
+    assert hasher.max_pending == REQUEST_THREADS - 1
+
+    # Hashes que só terminam quando o teste deixar
+    release = threading.Event()
+
+    def slow_check(stored, password):
+        release.wait(10)
+        return True
+
+    monkeypatch.setattr(auth, 'check_password_hash', slow_check)
+
+    def login():
+        try:
+            return 200 if hasher.verify(stored, 'senha') else 401
+        except HasherBusy:
+            return 503
+
+    with ThreadPoolExecutor(REQUEST_THREADS) as request_threads:
+        logins = [request_threads.submit(login) for _ in range(20)]
+        catalogue = request_threads.submit(lambda: 'catálogo')
+        # Os logins além do limite são recusados na hora e liberam as threads
+        assert catalogue.result(timeout=2) == 'catálogo'
+        release.set()
+        statuses = [future.result(timeout=10) for future in logins]
+
+    assert statuses.count(503) >= len(logins) - (REQUEST_THREADS - 1)
+    assert 200 in statuses
+
+
+def test_single_request_thread_still_accepts_logins():
+    assert PasswordHasher(workers=1, max_pending=32, request_threads=1).max_pending == 1
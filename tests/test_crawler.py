@@ -0,0 +1,51 @@
+from scraping import Crawler
+
+
+def test_retries_transient_errors(stub_server):
+    stub_server.responses['/flaky'] = [503, 502, 200]
+    with Crawler(concurrency=2, retries=3, backoff=0.01) as crawler:
+        result = crawler.fetch(stub_server.url('/flaky'))
+    assert result.ok
+    assert result.attempts == 3
+    assert '/flaky' in result.text
+    assert crawler.stats.retries == 2
+    assert crawler.stats.errors == 0
+
+
+def test_gives_up_after_retries(stub_server):
+    stub_server.responses['/down'] = [500]
+    with Crawler(concurrency=2, retries=2, backoff=0.01) as crawler:
+        result = crawler.fetch(stub_server.url('/down'))
+    assert result.status == 500
+    assert result.attempts == 3
+    assert crawler.stats.errors == 1
+    assert len(stub_server.hits) == 3
+
+
+def test_connection_error_is_reported(stub_server):
+    url = stub_server.url('/')
+    stub_server.close()
+    with Crawler(concurrency=1, retries=1, backoff=0.01, timeout=1) as crawler:
+        result = crawler.fetch(url)
+    assert not result.ok
+    assert result.status is None
+    assert result.error
+    assert result.attempts == 2
+
+
+def test_rate_limit_per_host(stub_server):
+    urls = [stub_server.url(f'/page-{page}') for page in range(6)]
+    with Crawler(concurrency=6, rate_per_host=20, retries=0) as crawler:
+        results = list(crawler.fetch_all(urls))
+    assert all(result.ok for result in results)
+    times = sorted(at for _, at in stub_server.hits)
+    # 20 por segundo: uma requisição a cada 50 ms, mesmo com 6 threads livres
+    assert all(later - earlier >= 0.04 for earlier, later in zip(times, times[1:]))
+
+
+def test_fetch_all_keeps_order_and_skips_duplicates(stub_server):
+    urls = [stub_server.url(f'/page-{page}') for page in (3, 1, 2, 1)]
+    with Crawler(concurrency=3, retries=0) as crawler:
+        results = list(crawler.fetch_all(urls))
+    assert [result.url for result in results] == urls[:3]
+    assert len(stub_server.hits) == 3
@@ -0,0 +1,47 @@
+import time
+
+from health import HealthMonitor, upstream_check
+
+
+def test_upstream_failure_then_recovery(stub_server):
+    stub_server.responses['/'] = [503, 200]
+    monitor = HealthMonitor(interval=60).add('upstream', upstream_check(stub_server.url('/'), timeout=1))
+    assert monitor.result('upstream') is None
+
+    monitor.run_once()
+    failed = monitor.result('upstream')
+    assert not failed['ok']
+    assert failed['code'] == 503
+
+    monitor.run_once()
+    recovered = monitor.result('upstream')
+    assert recovered['ok']
+    assert recovered['code'] == 200
+    assert recovered['checked_at'] >= failed['checked_at']
+
+
+def test_connection_error_counts_as_failure(stub_server):
+    url = stub_server.url('/')
+    stub_server.close()
+    monitor = HealthMonitor(interval=60).add('upstream', upstream_check(url, timeout=1))
+    monitor.run_once()
+    result = monitor.result('upstream')
+    assert not result['ok']
+    assert result['error'].startswith('ConnectionError')
+
+
+def test_background_thread_picks_up_recovery(stub_server):
+    stub_server.responses['/'] = [500, 500, 200]
+    monitor = HealthMonitor(interval=0.05).add('upstream', upstream_check(stub_server.url('/'), timeout=1))
+    monitor.start()
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            result = monitor.result('upstream')
+            if result is not None and result['ok']:
+                break
+            time.sleep(0.02)
+    finally:
+        monitor.stop(wait=True)
+    assert monitor.result('upstream')['ok']
+    assert len(stub_server.hits) >= 3
@@ -0,0 +1,66 @@
+import sys
+import time
+
+from jobs import DONE, FAILED, ORPHANED, RUNNING, ScrapeJob, ScrapeQueue
+
+# Scraping falso: informa o andamento e espera o arquivo `release` existir
+SCRIPT = """
+import json, os, sys, time
+print('PROGRESS ' + json.dumps({'done': 1, 'total': 2, 'pages': 1, 'pages_per_sec': 1.0, 'errors': 0}), flush=True)
+while not os.path.exists(sys.argv[1]):
+    time.sleep(0.01)
+"""
+
+
+def queues(tmp_path, count=2):
+    """Filas de `count` processos da API (workers) sobre os mesmos arquivos."""
+    release = tmp_path / 'release'
+    return release, [
+        ScrapeQueue(
+            lambda options: [sys.executable, '-c', SCRIPT, str(release)],
+            lock_path=str(tmp_path / 'catalogue.csv.lock'),
+            state_path=str(tmp_path / 'catalogue.csv.jobs.json'),
+        )
+        for _ in range(count)
+    ]
+
+
+def wait_for(check, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_jobs_are_shared_between_workers(tmp_path):
+    release, (first, second) = queues(tmp_path)
+    job, created = first.submit({'incremental': False})
+    assert created
+
+    wait_for(lambda: second.get(job.id).progress['done'] == 1)
+    assert second.get(job.id).state == RUNNING
+    # O disparo em outro worker devolve o job ativo em vez de 409
+    same, created = second.submit({'incremental': True})
+    assert not created
+    assert same.id == job.id
+
+    release.touch()
+    wait_for(lambda: second.get(job.id).state == DONE)
+    assert first.get(job.id).finished_at is not None
+
+    newer, created = second.submit({'incremental': False})
+    assert created
+    assert newer.id != job.id
+
+
+def test_active_job_of_a_dead_worker_is_reported_as_failed(tmp_path):
+    _, (queue,) = queues(tmp_path, 1)
+    # Estado deixado por um worker que morreu com o job em execução (o lock dele foi liberado)
+    with queue._state() as jobs:
+        orphan = ScrapeJob({'incremental': False})
+        orphan.state = RUNNING
+        jobs[orphan.id] = orphan
+
+    found = queue.get(orphan.id)
+    assert found.state == FAILED
+    assert found.error == ORPHANED
@@ -0,0 +1,160 @@
+"""Parsing e scraping sobre páginas salvas do books.toscrape.com (tests/fixtures).
+
+As páginas seguem a marcação do site, sem os scripts e a barra lateral:
+dois livros com descrição, um sem, e as duas páginas do catálogo que os listam.
+"""
+import csv
+import os
+import sys
+
+import pytest
+
+from scraping import BACKENDS, ParserPool
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+sys.path.insert(0, SCRIPTS)
+
+import books_scraping  # noqa: E402
+import url_scraping  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SITE = 'https://books.toscrape.com/'
+ATTIC = 'catalogue/a-light-in-the-attic_1000/index.html'
+VELVET = 'catalogue/tipping-the-velvet_999/index.html'
+BRIDGE = ('catalogue/the-bridge-to-consciousness-im-writing-the-bridge-between-science-and-our-old-and-new-beliefs_840/'
+          'index.html')
+BRIDGE_TITLE = "The Bridge to Consciousness: I'm Writing the Bridge Between Science and Our Old and New Beliefs."
+
+# Campos esperados de cada página de produto; a descrição é conferida pelo começo
+EXPECTED = {
+    ATTIC: {
+        'title': 'A Light in the Attic',
+        'category': 'Poetry',
+        'price': '51.77',
+        'stock': 22,
+        'availability': 'In stock (22 available)',
+        'image': SITE + 'media/cache/fe/72/fe72f0532301ec28892ae79a629a293c.jpg',
+        'rating': 3,
+        'description': "It's hard to imagine a world without A Light in the Attic.",
+    },
+    VELVET: {
+        'title': 'Tipping the Velvet',
+        'category': 'Historical Fiction',
+        'price': '53.74',
+        'stock': 20,
+        'availability': 'In stock (20 available)',
+        'image': SITE + 'media/cache/08/e9/08e94f3731d7d6b760dfbfbc02ca5c62.jpg',
+        'rating': 1,
+        'description': '"Erotic and absorbing...Written with starling power."',
+    },
+    BRIDGE: {
+        'title': BRIDGE_TITLE,
+        'category': 'Default',
+        'price': '32.00',
+        'stock': 15,
+        'availability': 'In stock (15 available)',
+        'image': SITE + 'media/cache/39/c7/39c7bebcde5d9643ede71ac8ee87ee69.jpg',
+        'rating': 3,
+        'description': None,
+    },
+}
+
+
+def fixture(path):
+    with open(os.path.join(FIXTURES, path), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def check_fields(fields, expected):
+    description = expected['description']
+    assert {**fields, 'description': None} == {**expected, 'description': None}
+    if description is None:
+        assert fields['description'] is None
+    else:
+        assert fields['description'].startswith(description)
+        assert fields['description'].endswith('...more')
+
+
+def read_rows(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def site(stub_server):
+    """Servidor local com as páginas salvas nos mesmos caminhos do site."""
+    for root, _, files in os.walk(FIXTURES):
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), FIXTURES).replace(os.sep, '/')
+            stub_server.pages['/' + path] = fixture(path)
+    return stub_server
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_parse_all_extracts_the_same_fields_on_every_backend(backend):
+    with ParserPool(0, backend) as parsers:
+        results = list(parsers.parse_all((path, fixture(path)) for path in EXPECTED))
+    assert [path for path, _, _ in results] == list(EXPECTED)
+    for path, fields, error in results:
+        assert error is None
+        check_fields(fields, EXPECTED[path])
+
+
+def test_books_scraping_writes_rows_and_keeps_previous_row_of_failed_page(site, tmp_path):
+    products = tmp_path / 'products.csv'
+    missing = SITE + 'catalogue/missing_1/index.html'
+    links = [SITE + ATTIC, SITE + VELVET, SITE + BRIDGE, missing]
+    products.write_text('url,index\n' + ''.join(f'{link},{index}\n' for link, index in zip(links, [1000, 999, 840, 1])),
+                        encoding='utf-8')
+    output = tmp_path / 'web_scraping.csv'
+    site.responses['/catalogue/missing_1/index.html'] = [404]
+
+    def scrape():
+        books_scraping.main(['--products', str(products), '--output', str(output), '--base-url', site.url('/'),
+                             '--parse-workers', '0', '--retries', '0', '--cache', str(tmp_path / 'cache.json'),
+                             '--no-snapshot'])
+
+    scrape()
+    rows = read_rows(output)
+    # O livro cuja página falhou e que não tinha linha anterior fica de fora
+    assert [row['Link'] for row in rows] == links[:3]
+    assert [(row['Title'], row['Category'], row['Price'], row['Stock'], row['Rating'], row['Index'])
+            for row in rows] == [
+        ('A Light in the Attic', 'Poetry', '51.77', '22', '3', '1000'),
+        ('Tipping the Velvet', 'Historical Fiction', '53.74', '20', '1', '999'),
+        (BRIDGE_TITLE, 'Default', '32.00', '15', '3', '840'),
+    ]
+    assert [row['Image'] for row in rows] == [EXPECTED[path]['image'] for path in EXPECTED]
+    assert rows[0]['Description'].startswith(EXPECTED[ATTIC]['description'])
+    assert rows[2]['Description'] == 'not found'
+
+    # Uma página que falha na próxima execução mantém a linha anterior do livro
+    site.responses['/' + VELVET] = [500]
+    scrape()
+    assert read_rows(output) == rows
+    assert ('/' + VELVET) in [path for path, _ in site.hits[-4:]]
+
+
+def test_url_scraping_builds_rows_and_keeps_output_when_a_listing_page_fails(site, tmp_path):
+    output = tmp_path / 'books_detalhados.csv'
+
+    def scrape():
+        url_scraping.main(['--output', str(output), '--base-url', site.url('/'), '--parse-workers', '0',
+                           '--retries', '0'])
+
+    scrape()
+    rows = read_rows(output)
+    assert [row['Link'] for row in rows] == [SITE + ATTIC, SITE + VELVET, SITE + BRIDGE]
+    assert [(row['Título'], row['Categoria'], row['Preço (£)'], row['Estoque']) for row in rows] == [
+        ('A Light in the Attic', 'Poetry', '51.77', 'In stock (22 available)'),
+        ('Tipping the Velvet', 'Historical Fiction', '53.74', 'In stock (20 available)'),
+        (BRIDGE_TITLE, 'Default', '32.00', 'In stock (15 available)'),
+    ]
+    assert rows[2]['Descrição'] == 'Sem descrição'
+    assert rows[0]['Imagem'] == EXPECTED[ATTIC]['image']
+
+    # Sem a segunda página do catálogo, o livro dela sumiria: o CSV anterior é mantido
+    site.responses['/catalogue/page-2.html'] = [500]
+    with pytest.raises(SystemExit):
+        scrape()
+    assert read_rows(output) == rows